@@ -4,42 +4,556 @@ Provides REST API and web interface for podcast generation
 """
 
 import os
+import atexit
 import asyncio
-import tempfile
-from datetime import datetime
-from flask import Flask, request, jsonify, send_file, render_template
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import quote
+from flask import (
+    Flask, Response, request, jsonify, send_file, send_from_directory, render_template
+)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import orjson
+
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
 
-import edge_tts
 from podcast_generator import PodcastGenerator
+from utils.tts_client import install_shared_resolver, close_shared_resolver, new_communicate
 from utils.voice_manager import (
     list_all_voices, 
     organize_voices_by_locale,
     get_demo_text_for_locale,
+    get_demo_text_bytes_for_locale,
+    detect_language_from_voice,
+    start_voice_prefetch,
     PODCAST_VOICES
 )
 from utils.script_parser import parse_podcast_script, get_script_statistics
 from utils.prosody import list_available_emotions
+from utils.logging_setup import get_logger
+
+
+logger = get_logger()
 
 
-app = Flask(__name__, static_folder='static', static_url_path='')
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return self.dumpb(obj, **kwargs).decode()
+    
+    def dumpb(self, obj, **kwargs):
+        """Serialize obj straight to UTF-8 bytes"""
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+    
+    def loads(self, s, **kwargs):
+        """Parse request bodies with orjson (accepts str or bytes)"""
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumpb(obj) + b"\n", mimetype=self.mimetype)
+
+
+class PodcastFlask(Flask):
+    """Flask app that runs async views on the persistent event loop"""
+    
+    json_provider_class = ORJSONProvider
+    
+    def async_to_sync(self, func):
+        def wrapper(*args, **kwargs):
+            future = asyncio.run_coroutine_threadsafe(func(*args, **kwargs), loop)
+            return future.result()
+        return wrapper
+
+
+app = PodcastFlask(__name__, static_folder='static', static_url_path='')
+app.logger.setLevel(logging.INFO)
 CORS(app)
 
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
+# Tighter per-endpoint body limits; rejected before the body is read or parsed
+REQUEST_SIZE_LIMITS = {
+    'generate_podcast': 64 * 1024,
+    'generate_from_script': 1024 * 1024,
+    'validate_script': 1024 * 1024,
+    'preview_script': 1024 * 1024,
+}
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 3600  # Static assets (JS/CSS)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+# Behind Apache mod_xsendfile, let it serve files instead of this process
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE') == '1'
+# Behind nginx, internal location mapped to OUTPUT_DIR (e.g. '/internal/')
+ACCEL_REDIRECT_PREFIX = os.getenv('ACCEL_REDIRECT_PREFIX')
+if COMPRESS_AVAILABLE:
+    Compress(app)
 OUTPUT_DIR = 'output'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+DEMO_CACHE_DIR = os.path.join(OUTPUT_DIR, 'demo_cache')
+DEMO_CACHE_MAX_FILES = 500
+AUDIO_CACHE_MAX_AGE = 604800  # 7 days - cached audio is content-addressed
+PODCAST_CACHE_DIR = os.path.join(OUTPUT_DIR, 'cache')
+PODCAST_CACHE_SIZE = 64  # entries kept in the in-memory index
+PODCAST_CACHE_MAX_FILES = 200
+CACHE_SWEEP_INTERVAL = 3600  # seconds between cache directory trims
+os.makedirs(DEMO_CACHE_DIR, exist_ok=True)
+os.makedirs(PODCAST_CACHE_DIR, exist_ok=True)
 
 # Global podcast generator instance
 podcast_generator = PodcastGenerator(output_dir=OUTPUT_DIR)
 
+def trim_cache_dir(cache_dir, max_files):
+    """
+    Delete the least recently accessed MP3s so a cache directory stays bounded
+    
+    Args:
+        cache_dir (str): Directory to trim
+        max_files (int): Number of files to keep
+    """
+    try:
+        entries = [e for e in os.scandir(cache_dir) if e.name.endswith('.mp3')]
+    except FileNotFoundError:
+        return
+    
+    if len(entries) <= max_files:
+        return
+    
+    entries.sort(key=lambda e: e.stat().st_atime)
+    for entry in entries[:len(entries) - max_files]:
+        try:
+            os.unlink(entry.path)
+        except OSError as e:
+            logger.warning("Could not trim cache file %s: %s", entry.path, e)
+
+
+def touch_cache_file(path):
+    """
+    Mark a cached file as just used, so the atime-based sweep keeps it
+    
+    Sets atime explicitly: noatime/relatime mounts don't update it on reads.
+    
+    Args:
+        path (str): Cached file path
+        
+    Returns:
+        bool: True if the file exists
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning("Could not touch cache file %s: %s", path, e)
+    return True
+
+
+def sweep_caches():
+    """Trim audio caches now and again every CACHE_SWEEP_INTERVAL seconds"""
+    trim_cache_dir(DEMO_CACHE_DIR, DEMO_CACHE_MAX_FILES)
+    trim_cache_dir(PODCAST_CACHE_DIR, PODCAST_CACHE_MAX_FILES)
+    
+    timer = threading.Timer(CACHE_SWEEP_INTERVAL, sweep_caches)
+    timer.daemon = True
+    timer.start()
+
+
+sweep_caches()
+
+# Persistent event loop shared by all async views, so Edge TTS connections
+# and other loop-bound state survive across requests
+loop = asyncio.new_event_loop()
+threading.Thread(target=lambda: loop.run_forever(), daemon=True).start()
+
+# Reuse DNS lookups across Edge TTS calls made on the loop
+asyncio.run_coroutine_threadsafe(install_shared_resolver(), loop).result()
+atexit.register(
+    lambda: asyncio.run_coroutine_threadsafe(close_shared_resolver(), loop).result(timeout=5)
+)
+
+# Edge TTS voice list cache (the upstream list practically never changes)
+_VOICES_CACHE = {'ts': 0, 'data': None, 'total': 0}
+_VOICES_TTL = 86400  # 24 hours
+_voices_lock = asyncio.Lock()
+
+
+async def load_voices():
+    """
+    Get voices organized by locale, fetching from Edge TTS only when the
+    cache is cold or expired
+    
+    Returns:
+        tuple: (organized voices dict, total voice count)
+    """
+    if _VOICES_CACHE['data'] is not None and time.monotonic() - _VOICES_CACHE['ts'] < _VOICES_TTL:
+        return _VOICES_CACHE['data'], _VOICES_CACHE['total']
+    
+    # Single-flight: concurrent cold-cache requests share one upstream call
+    async with _voices_lock:
+        if _VOICES_CACHE['data'] is None or time.monotonic() - _VOICES_CACHE['ts'] >= _VOICES_TTL:
+            voices = await list_all_voices()
+            _VOICES_CACHE['data'] = organize_voices_by_locale(voices)
+            _VOICES_CACHE['total'] = len(voices)
+            _VOICES_CACHE['ts'] = time.monotonic()
+    
+    return _VOICES_CACHE['data'], _VOICES_CACHE['total']
+
+
+# Pre-warm the voice cache so the first visitor doesn't pay for the fetch:
+# the list is fetched (or read from disk) on a background thread, then
+# organized on the loop. Set AIPODCAST_PREFETCH_VOICES=0 to skip
+if os.getenv('AIPODCAST_PREFETCH_VOICES', '1') != '0':
+    start_voice_prefetch()
+    asyncio.run_coroutine_threadsafe(load_voices(), loop)
+
+
+def iter_async(agen):
+    """
+    Drive an async generator on the persistent loop from a sync iterator
+    
+    Args:
+        agen: Async generator to consume
+        
+    Yields:
+        Items produced by the async generator
+    """
+    async def next_item():
+        return await agen.__anext__()
+    
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(next_item(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+def stream_audio(agen, download_name, as_attachment=False):
+    """
+    Build a streaming MP3 response from an async generator of audio chunks
+    
+    Args:
+        agen: Async generator yielding MP3 bytes
+        download_name (str): Filename suggested to the client
+        as_attachment (bool): Send as a download instead of inline
+        
+    Returns:
+        Response: Chunked audio/mpeg response
+    """
+    # No stream_with_context: iter_async drains the generator from the WSGI
+    # thread after the view returns, and the generator doesn't need the
+    # request once it has been created
+    return Response(
+        iter_async(agen),
+        mimetype='audio/mpeg',
+        headers={'Content-Disposition': content_disposition(download_name, as_attachment)}
+    )
+
+
+def content_disposition(download_name, as_attachment):
+    """
+    Build a Content-Disposition header value, encoding non-ASCII names
+    
+    Args:
+        download_name (str): Filename suggested to the client
+        as_attachment (bool): Download instead of displaying inline
+        
+    Returns:
+        str: Header value
+    """
+    disposition = 'attachment' if as_attachment else 'inline'
+    if download_name.isascii():
+        # Names come from user topics: drop control characters and escape
+        # the quoted-string specials so the header stays well-formed
+        name = ''.join(ch for ch in download_name if ch.isprintable())
+        name = name.replace('\\', '\\\\').replace('"', '\\"')
+        return f'{disposition}; filename="{name}"'
+    return f"{disposition}; filename*=UTF-8''{quote(download_name)}"
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_cached(script_text):
+    """Parse a script once per distinct text (validate -> preview -> generate)"""
+    segments = parse_podcast_script(script_text)
+    stats = get_script_statistics(segments) if segments else None
+    return tuple(segments), stats
+
+
+def parse_script(script_text):
+    """
+    Parse a script through the parse cache
+    
+    Args:
+        script_text (str): Raw script text
+        
+    Returns:
+        tuple: (segments, stats) - fresh segment dicts callers may modify,
+            and the script statistics (None when there are no segments)
+    """
+    segments, stats = _parse_cached(script_text)
+    return [dict(segment) for segment in segments], stats
+
+
+# Generated podcasts keyed by their inputs: in-memory LRU index over files on disk
+_podcast_cache = OrderedDict()
+
+
+def podcast_cache_key(script_text, custom_voices, language):
+    """
+    Compute the cache key for a podcast render
+    
+    Args:
+        script_text (str): Podcast script
+        custom_voices (dict): Custom voice mapping (or None)
+        language (str): Language code
+        
+    Returns:
+        str: Hex digest identifying the render
+    """
+    payload = json.dumps(
+        {'script': script_text, 'voices': custom_voices, 'lang': language},
+        sort_keys=True
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def get_cached_podcast(key):
+    """
+    Look up a previously generated podcast
+    
+    Args:
+        key (str): Key from podcast_cache_key
+        
+    Returns:
+        str: Path to the cached MP3, or None on a miss
+    """
+    path = _podcast_cache.get(key)
+    if path is not None and touch_cache_file(path):
+        _podcast_cache.move_to_end(key)
+        return path
+    
+    path = os.path.join(PODCAST_CACHE_DIR, f"{key}.mp3")
+    if touch_cache_file(path):
+        remember_podcast(key, path)
+        return path
+    
+    return None
+
+
+def remember_podcast(key, path):
+    """
+    Record a generated podcast in the in-memory LRU index
+    
+    Args:
+        key (str): Key from podcast_cache_key
+        path (str): Path to the MP3 in PODCAST_CACHE_DIR
+    """
+    _podcast_cache[key] = path
+    _podcast_cache.move_to_end(key)
+    while len(_podcast_cache) > PODCAST_CACHE_SIZE:
+        _podcast_cache.popitem(last=False)
+
+
+def store_podcast(key, output_path):
+    """
+    Move a freshly generated podcast into the cache
+    
+    Args:
+        key (str): Key from podcast_cache_key
+        output_path (str): Path the generator wrote to
+        
+    Returns:
+        str: Path to the cached MP3
+    """
+    cache_path = os.path.join(PODCAST_CACHE_DIR, f"{key}.mp3")
+    os.replace(output_path, cache_path)
+    remember_podcast(key, cache_path)
+    return cache_path
+
+
+# Renders in progress, so concurrent identical requests share one synthesis
+_inflight_podcasts = {}
+
+# Renders run on a fixed pool of workers fed by a bounded queue; when the
+# queue is full, requests are turned away with 429 instead of piling onto
+# Edge TTS and risking a rate-limit ban
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', 4))
+RENDER_QUEUE_SIZE = 64
+render_queue = asyncio.Queue(maxsize=RENDER_QUEUE_SIZE)
+
+
+async def render_worker():
+    """Run queued podcast renders one at a time, forever"""
+    while True:
+        render, future = await render_queue.get()
+        try:
+            if not future.done():
+                future.set_result(await render())
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        except asyncio.CancelledError:
+            # Never leave a submitter waiting on a render that stopped
+            if not future.done():
+                future.cancel()
+            # Keep serving unless this worker itself is being shut down
+            if asyncio.current_task().cancelling():
+                raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            render_queue.task_done()
+
+
+async def submit_render(render):
+    """
+    Queue a render for the worker pool and wait for its result
+    
+    Args:
+        render: Coroutine function that generates the podcast and returns its path
+        
+    Returns:
+        str: Path returned by render
+        
+    Raises:
+        asyncio.QueueFull: If the render queue is at capacity
+    """
+    future = loop.create_future()
+    render_queue.put_nowait((render, future))
+    return await future
+
+
+for _ in range(TTS_WORKERS):
+    asyncio.run_coroutine_threadsafe(render_worker(), loop)
+
+
+async def render_podcast(key, render):
+    """
+    Get the cached podcast for a key, rendering it at most once at a time
+    
+    Args:
+        key (str): Key from podcast_cache_key
+        render: Coroutine function that generates the podcast and returns its path
+        
+    Returns:
+        str: Path to the cached MP3
+    """
+    cached_path = get_cached_podcast(key)
+    if cached_path:
+        logger.info("Serving cached podcast %s", key)
+        return cached_path
+    
+    inflight = _inflight_podcasts.get(key)
+    if inflight is not None:
+        logger.info("Waiting for in-flight podcast %s", key)
+        return await asyncio.shield(inflight)
+    
+    future = loop.create_future()
+    _inflight_podcasts[key] = future
+    try:
+        path = store_podcast(key, await submit_render(render))
+        future.set_result(path)
+        return path
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved; waiters (if any) still get it
+        raise
+    finally:
+        del _inflight_podcasts[key]
+
+
+def send_audio(path, key, download_name, as_attachment=True):
+    """
+    Send a cached MP3 with validators so clients can revalidate cheaply
+    
+    With ACCEL_REDIRECT_PREFIX set, nginx streams the file itself via
+    X-Accel-Redirect and the worker is freed immediately.
+    
+    Args:
+        path (str): Path to the cached MP3 under OUTPUT_DIR
+        key (str): Cache key, used as the ETag
+        download_name (str): Filename suggested to the client
+        as_attachment (bool): Download instead of playing inline
+        
+    Returns:
+        Response: Audio file response
+    """
+    if not ACCEL_REDIRECT_PREFIX:
+        return send_file(
+            path,
+            mimetype='audio/mpeg',
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+            etag=key,
+            max_age=AUDIO_CACHE_MAX_AGE
+        )
+    
+    relative_path = os.path.relpath(path, OUTPUT_DIR).replace(os.sep, '/')
+    response = Response(mimetype='audio/mpeg')
+    response.headers['X-Accel-Redirect'] = ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + relative_path
+    response.headers['Content-Disposition'] = content_disposition(download_name, as_attachment)
+    response.cache_control.public = True
+    response.cache_control.max_age = AUDIO_CACHE_MAX_AGE
+    response.set_etag(key)
+    
+    # Answer If-None-Match here; nginx would otherwise follow the redirect
+    # and send the whole file again
+    response.make_conditional(request)
+    if response.status_code == 304:
+        del response.headers['X-Accel-Redirect']
+    return response
+
+
+@app.before_request
+def check_request_size():
+    """Turn away oversized JSON bodies before they are read"""
+    limit = REQUEST_SIZE_LIMITS.get(request.endpoint)
+    if limit is not None and (request.content_length or 0) > limit:
+        return jsonify({
+            'success': False,
+            'error': f'Request body too large (max {limit} bytes)'
+        }), 413
+
+
+@app.after_request
+def add_cache_headers(response):
+    """Let browsers reuse voice demos instead of re-requesting them"""
+    if request.path.startswith('/api/voice/demo/') and response.status_code in (200, 304):
+        response.cache_control.public = True
+        response.cache_control.max_age = AUDIO_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
 
 @app.route('/')
 def index():
     """Serve main web interface"""
-    return send_file('static/index.html')
+    return send_from_directory(app.static_folder, 'index.html', conditional=True, max_age=300)
 
 
+@app.route('/api/voices', methods=['GET'])
 async def get_voices():
     """
     Get all available voices organized by locale
@@ -54,13 +568,12 @@ async def get_voices():
         }
     """
     try:
-        voices = await list_all_voices()
-        organized = organize_voices_by_locale(voices)
+        organized, total = await load_voices()
         
         return jsonify({
             'success': True,
             'voices': organized,
-            'total': len(voices)
+            'total': total
         })
     
     except Exception as e:
@@ -70,6 +583,15 @@ async def get_voices():
         }), 500
 
 
+# Constant payloads, serialized once at import
+_DEFAULT_VOICES_JSON = orjson.dumps(
+    {'success': True, 'voices': PODCAST_VOICES}, option=orjson.OPT_SORT_KEYS
+)
+_EMOTIONS_JSON = orjson.dumps(
+    {'success': True, 'emotions': list_available_emotions()}, option=orjson.OPT_SORT_KEYS
+)
+
+
 @app.route('/api/voices/default', methods=['GET'])
 def get_default_voices():
     """
@@ -78,10 +600,7 @@ def get_default_voices():
     Returns:
         JSON: Default voice mapping for speakers
     """
-    return jsonify({
-        'success': True,
-        'voices': PODCAST_VOICES
-    })
+    return Response(_DEFAULT_VOICES_JSON, mimetype='application/json')
 
 
 @app.route('/api/emotions', methods=['GET'])
@@ -92,14 +611,10 @@ def get_emotions():
     Returns:
         JSON: List of emotions with prosody details
     """
-    emotions = list_available_emotions()
-    
-    return jsonify({
-        'success': True,
-        'emotions': emotions
-    })
+    return Response(_EMOTIONS_JSON, mimetype='application/json')
 
 
+@app.route('/api/voice/demo/<voice_id>', methods=['GET'])
 async def voice_demo(voice_id):
     """
     Generate demo audio for a specific voice
@@ -112,28 +627,32 @@ async def voice_demo(voice_id):
     """
     try:
         # Detect language from voice ID and get appropriate demo text
-        locale = voice_id.split('-')
-        if len(locale) >= 2:
-            locale = f"{locale[0]}-{locale[1]}"
-        else:
-            locale = 'en-US'
-        
+        locale = detect_language_from_voice(voice_id)
         demo_text = get_demo_text_for_locale(locale)
         
-        # Generate audio
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3', dir=OUTPUT_DIR)
-        temp_path = temp_file.name
-        temp_file.close()
+        # Demo audio is deterministic for (voice, text), so cache it by content
+        # hash (the text's UTF-8 bytes are encoded once, at import)
+        key_hash = hashlib.blake2b(f"{voice_id}|".encode(), digest_size=16)
+        key_hash.update(get_demo_text_bytes_for_locale(locale))
+        key = key_hash.hexdigest()
+        cache_path = os.path.join(DEMO_CACHE_DIR, f"{key}.mp3")
         
-        communicate = edge_tts.Communicate(demo_text, voice_id)
-        await communicate.save(temp_path)
+        if not touch_cache_file(cache_path):
+            # Write to a private file first so concurrent requests never see a partial MP3
+            partial_path = f"{cache_path}.{uuid.uuid4().hex}.part"
+            communicate = new_communicate(demo_text, voice_id)
+            try:
+                await communicate.save(partial_path)
+                os.replace(partial_path, cache_path)
+            except BaseException:
+                # Don't leave a half-written demo behind in the cache dir
+                try:
+                    os.unlink(partial_path)
+                except OSError:
+                    pass
+                raise
         
-        return send_file(
-            temp_path,
-            mimetype='audio/mpeg',
-            as_attachment=False,
-            download_name=f"demo_{voice_id}.mp3"
-        )
+        return send_audio(cache_path, key, f"demo_{voice_id}.mp3", as_attachment=False)
     
     except Exception as e:
         return jsonify({
@@ -142,6 +661,7 @@ async def voice_demo(voice_id):
         }), 500
 
 
+@app.route('/api/podcast/generate', methods=['POST'])
 async def generate_podcast():
     """
     Generate podcast from topic and requirements
@@ -155,14 +675,15 @@ async def generate_podcast():
             "tone": "professional",  # or casual, educational, entertaining
             "structure": "interview",
             "key_points": ["Point 1", "Point 2"]
-        }
+        },
+        "stream": false  # optional: stream unmastered audio as it is synthesized
     }
     
     Returns:
         Audio: Generated podcast MP3 file
     """
     try:
-        data = request.json
+        data = request.get_json(cache=True, silent=True) or {}
         topic = data.get('topic')
         requirements = data.get('requirements', {})
         
@@ -180,14 +701,34 @@ async def generate_podcast():
         custom_voices = data.get('voices', None)
         
         # Generate script using Gemini AI
-        print(f"Generating script for topic: {topic}")
-        print(f"  Language: {language}, Duration: {duration_minutes} min, Tone: {tone}")
+        logger.info("Generating script for topic: %s", topic)
+        logger.info("  Language: %s, Duration: %s min, Tone: %s", language, duration_minutes, tone)
         if key_points:
-            print(f"  Key points: {', '.join(key_points)}")
+            logger.info("  Key points: %s", ', '.join(key_points))
         if custom_voices:
-            print(f"  Custom voices: {custom_voices}")
+            logger.info("  Custom voices: %s", custom_voices)
+        
+        download_name = f"podcast_{topic[:30].replace(' ', '_')}.mp3"
+        
+        if data.get('stream'):
+            # TTS starts on each segment as soon as the script generator emits it
+            logger.info("Streaming podcast audio...")
+            return stream_audio(
+                podcast_generator.stream_from_topic(
+                    topic,
+                    duration_minutes=duration_minutes,
+                    tone=tone,
+                    key_points=key_points,
+                    language=language,
+                    custom_voices=custom_voices
+                ),
+                download_name,
+                as_attachment=True
+            )
         
-        script = podcast_generator.generate_template_script(
+        # Gemini calls block; keep them off the loop so other renders keep going
+        script = await asyncio.to_thread(
+            podcast_generator.generate_template_script,
             topic,
             duration_minutes=duration_minutes,
             tone=tone,
@@ -195,34 +736,37 @@ async def generate_podcast():
             language=language
         )
         
-        # Generate podcast
-        print(f"Generating podcast audio...")
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_filename = f"podcast_{timestamp}.mp3"
+        key = podcast_cache_key(script, custom_voices, language)
         
-        output_path = await podcast_generator.generate_from_script(
-            script,
-            output_filename=output_filename,
-            custom_voices=custom_voices,
-            language=language
-        )
+        async def render():
+            logger.info("Generating podcast audio...")
+            return await podcast_generator.generate_from_script(
+                script,
+                output_filename=f"podcast_{key}.mp3",
+                custom_voices=custom_voices,
+                language=language,
+                _trusted=True
+            )
         
         # Return the audio file
-        return send_file(
-            output_path,
-            mimetype='audio/mpeg',
-            as_attachment=True,
-            download_name=f"podcast_{topic[:30].replace(' ', '_')}.mp3"
-        )
+        output_path = await render_podcast(key, render)
+        return send_audio(output_path, key, download_name)
+    
+    except asyncio.QueueFull:
+        return jsonify({
+            'success': False,
+            'error': 'Server is busy generating other podcasts, please retry shortly'
+        }), 429
     
     except Exception as e:
-        print(f"Error generating podcast: {e}")
+        logger.error("Error generating podcast: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
+@app.route('/api/podcast/from-script', methods=['POST'])
 async def generate_from_script():
     """
     Generate podcast from custom script
@@ -233,14 +777,15 @@ async def generate_from_script():
         "voices": {
             "HOST": "en-US-JennyNeural",
             "GUEST": "en-US-GuyNeural"
-        }
+        },
+        "stream": false  # optional: stream unmastered audio as it is synthesized
     }
     
     Returns:
         Audio: Generated podcast MP3 file
     """
     try:
-        data = request.json
+        data = request.get_json(cache=True, silent=True) or {}
         script_text = data.get('script')
         custom_voices = data.get('voices')
         
@@ -251,34 +796,43 @@ async def generate_from_script():
             }), 400
         
         # Validate script
-        segments = parse_podcast_script(script_text)
+        segments, stats = parse_script(script_text)
         if not segments:
             return jsonify({
                 'success': False,
                 'error': 'Invalid script format. Use [SPEAKER|emotion] text'
             }), 400
         
-        # Generate podcast
-        print(f"Generating podcast from custom script ({len(segments)} segments)")
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_filename = f"podcast_custom_{timestamp}.mp3"
+        if data.get('stream'):
+            logger.info("Streaming podcast from custom script (%d segments)", len(segments))
+            return stream_audio(
+                podcast_generator.stream_from_segments(segments, custom_voices=custom_voices),
+                'podcast_custom.mp3',
+                as_attachment=True
+            )
         
-        output_path = await podcast_generator.generate_from_script(
-            script_text,
-            custom_voices=custom_voices,
-            output_filename=output_filename
-        )
+        key = podcast_cache_key(script_text, custom_voices, 'en-US')
+        
+        async def render():
+            logger.info("Generating podcast from custom script (%d segments)", len(segments))
+            return await podcast_generator.generate_from_segments(
+                segments,
+                custom_voices=custom_voices,
+                output_filename=f"podcast_custom_{key}.mp3"
+            )
         
         # Return the audio file
-        return send_file(
-            output_path,
-            mimetype='audio/mpeg',
-            as_attachment=True,
-            download_name='podcast_custom.mp3'
-        )
+        output_path = await render_podcast(key, render)
+        return send_audio(output_path, key, 'podcast_custom.mp3')
+    
+    except asyncio.QueueFull:
+        return jsonify({
+            'success': False,
+            'error': 'Server is busy generating other podcasts, please retry shortly'
+        }), 429
     
     except Exception as e:
-        print(f"Error generating podcast from script: {e}")
+        logger.error("Error generating podcast from script: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -299,7 +853,7 @@ def validate_script():
         JSON: Validation results and statistics
     """
     try:
-        data = request.json
+        data = request.get_json(cache=True, silent=True) or {}
         script_text = data.get('script')
         
         if not script_text:
@@ -309,7 +863,7 @@ def validate_script():
             }), 400
         
         # Parse and validate
-        segments = parse_podcast_script(script_text)
+        segments, stats = parse_script(script_text)
         
         if not segments:
             return jsonify({
@@ -318,9 +872,6 @@ def validate_script():
                 'error': 'No valid segments found. Use format: [SPEAKER|emotion] text'
             })
         
-        # Get statistics
-        stats = get_script_statistics(segments)
-        
         return jsonify({
             'success': True,
             'valid': True,
@@ -335,6 +886,7 @@ def validate_script():
         }), 500
 
 
+@app.route('/api/script/preview', methods=['POST'])
 async def preview_script():
     """
     Generate a script preview (first 30 seconds)
@@ -345,10 +897,10 @@ async def preview_script():
     }
     
     Returns:
-        Audio: Preview MP3 file
+        Audio: Preview MP3 stream
     """
     try:
-        data = request.json
+        data = request.get_json(cache=True, silent=True) or {}
         script_text = data.get('script')
         
         if not script_text:
@@ -358,36 +910,21 @@ async def preview_script():
             }), 400
         
         # Parse script and take first 2 segments for preview
-        segments = parse_podcast_script(script_text)
+        segments, stats = parse_script(script_text)
         if not segments:
             return jsonify({
                 'success': False,
                 'error': 'Invalid script format'
             }), 400
         
-        # Create preview script (first 2 segments only)
-        preview_segments = segments[:2]
-        from utils.script_parser import format_script_for_display
-        preview_script = format_script_for_display(preview_segments)
-        
-        # Generate preview audio
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_filename = f"preview_{timestamp}.mp3"
-        
-        output_path = await podcast_generator.generate_from_script(
-            preview_script,
-            output_filename=output_filename
-        )
-        
-        return send_file(
-            output_path,
-            mimetype='audio/mpeg',
-            as_attachment=False,
-            download_name='preview.mp3'
+        # Stream the first 2 segments so playback can start with the first chunk
+        return stream_audio(
+            podcast_generator.stream_from_segments(segments[:2]),
+            'preview.mp3'
         )
     
     except Exception as e:
-        print(f"Error generating preview: {e}")
+        logger.error("Error generating preview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -404,23 +941,6 @@ def health_check():
     })
 
 
-# Async route wrapper
-def async_route(f):
-    """Wrapper to handle async routes in Flask"""
-    def wrapper(*args, **kwargs):
-        return asyncio.run(f(*args, **kwargs))
-    wrapper.__name__ = f.__name__
-    return wrapper
-
-
-# Apply async wrapper to async routes
-app.route('/api/voices', methods=['GET'])(async_route(get_voices))
-app.route('/api/voice/demo/<voice_id>', methods=['GET'])(async_route(voice_demo))
-app.route('/api/podcast/generate', methods=['POST'])(async_route(generate_podcast))
-app.route('/api/podcast/from-script', methods=['POST'])(async_route(generate_from_script))
-app.route('/api/script/preview', methods=['POST'])(async_route(preview_script))
-
-
 if __name__ == '__main__':
     print("=" * 60)
     print("🎙️  Professional Podcast Generator")
@@ -429,6 +949,10 @@ if __name__ == '__main__':
     print(f" Output directory: {OUTPUT_DIR}")
     print("\n Server running at: http://localhost:5000")
     print(" Press Ctrl+C to stop\n")
+    print(" For production use ./run.sh (gunicorn) instead")
     print("=" * 60)
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Debug mode and the reloader only when asked for: the reloader re-imports
+    # the app in a child process, which starts a second event loop and cache sweep
+    dev_mode = os.getenv('FLASK_DEV') == '1'
+    app.run(host='0.0.0.0', port=5000, debug=dev_mode, threaded=True)
@@ -4,45 +4,287 @@ Core logic for generating multi-speaker podcasts with Edge TTS
 """
 
 import os
-import asyncio
-import edge_tts
+import re
+import functools
+import uuid
+import hashlib
+import random
+import shutil
 import tempfile
+from types import MappingProxyType
+import asyncio
 from datetime import datetime
 # pydub removed - no ffmpeg dependency
+import aiohttp
 import google.generativeai as genai
+from edge_tts.exceptions import NoAudioReceived, WebSocketError
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 from utils.script_parser import parse_podcast_script, validate_script, split_long_segment
-from utils.voice_manager import assign_voices_to_script, PODCAST_VOICES
-from utils.prosody import build_ssml_with_emotion, get_prosody_for_emotion
+from utils.voice_manager import assign_voices_to_script
+from utils.tts_client import new_communicate
+from utils.request_pool import RequestPool, AsyncTokenBucket
+from utils.logging_setup import get_logger
 from utils.audio_processor import (
-    apply_audio_effects,
-    apply_master_processing,
-    merge_audio_segments,
-    create_silence,
+    SegmentMerger,
+    master_mp3_bytes,
+    silence_mp3,
     get_audio_duration
 )
 
+logger = get_logger('generator')
+
+# Text cleanup applied before TTS, in order: (compiled pattern, replacement)
+_CLEANUP_PATTERNS = [
+    # Remove markdown formatting (bold, italic, etc.)
+    (re.compile(r'\*\*([^*]+)\*\*'), r'\1'),  # **bold**
+    (re.compile(r'\*([^*]+)\*'), r'\1'),       # *italic*
+    (re.compile(r'__([^_]+)__'), r'\1'),       # __bold__
+    (re.compile(r'_([^_]+)_'), r'\1'),         # _italic_
+    (re.compile(r'~~([^~]+)~~'), r'\1'),       # ~~strikethrough~~
+    
+    # Remove XML/SSML tags completely (including their content)
+    (re.compile(r'<[^>]+>'), ''),
+    
+    # Remove XML attributes and namespaces
+    (re.compile(r'xmlns[:\w]*\s*=\s*["\'][^"\']*["\']'), ''),
+    
+    # Remove any remaining speaker tags if present
+    (re.compile(r'\[([A-Z\-]+)\|(\w+)\]\s*'), ''),
+] + [
+    # Remove technical terms that might have leaked in
+    (re.compile(pattern, re.IGNORECASE), '')
+    for pattern in [
+        r'xmlns[\w\s:="\'/.]*',
+        r'voice\s+model[:\s]+[\w\-]+',
+        r'prosody\s+rate[:\s]+[\+\-]?\d+%',
+        r'prosody[:\s]+[\+\-]?\d+%',
+        r'pitch[:\s]+[\+\-]?\d+%',
+        r'volume[:\s]+[\+\-]?\d+dB',
+        r'with\s+prosody\s+',
+        r'using\s+voice\s+',
+        r'rate\s+of\s+[\+\-]?\d+%',
+        r'voice\s+name[:\s]+[\w\-]+',
+        r'speak\s+version[:\s]+[\d\.]+',
+    ]
+]
+
+# Max Edge TTS requests in flight per generator (shared by all requests);
+# higher fan-out risks throttling
+MAX_CONCURRENT_SEGMENTS = 4
+
+_WS_RE = re.compile(r'\s+')
+
+# Prompt vocabulary for Gemini script generation (read-only)
+_LANGUAGE_NAMES = MappingProxyType({
+    'en-US': 'English',
+    'es-ES': 'Spanish',
+    'fr-FR': 'French',
+    'de-DE': 'German',
+    'it-IT': 'Italian',
+    'pt-BR': 'Portuguese',
+    'hi-IN': 'Hindi',
+    'zh-CN': 'Chinese',
+    'ja-JP': 'Japanese',
+    'ko-KR': 'Korean',
+    'ar-SA': 'Arabic',
+    'ru-RU': 'Russian',
+    'ta-IN': 'Tamil',
+    'te-IN': 'Telugu',
+    'ml-IN': 'Malayalam',
+    'bn-IN': 'Bengali'
+})
+
+_TONE_INSTRUCTIONS = MappingProxyType({
+    'professional': 'professional interview style with expert analysis',
+    'casual': 'casual, friendly conversation between friends',
+    'educational': 'educational lecture format with clear explanations',
+    'entertaining': 'entertaining and engaging debate or discussion'
+})
+
+# Gemini prompt; tone and language are filled in per (tone, language) by
+# _prompt_template, the rest per request
+_PROMPT_TEMPLATE = """Generate a podcast script about: {topic}
+
+Requirements:
+- Style: {tone_style}
+- Target length: approximately {target_words} words (for {duration_minutes} minutes at 150 words/minute)
+- Format: Use [SPEAKER|emotion] before each line{key_points_text}{language_instruction}
+
+Available speakers: HOST, GUEST, CO-HOST, NARRATOR
+Available emotions: enthusiastic, calm, questioning, explaining, excited, thoughtful, serious, grateful, intrigued, amazed, greeting, closing, warm, optimistic, storytelling
+
+Format example:
+[HOST|enthusiastic] Welcome to our podcast! Today we're exploring {topic}.
+[GUEST|calm] Thanks for having me. I'm excited to discuss this topic.
+[HOST|questioning] Let's start with the basics...
+
+CRITICAL INSTRUCTIONS:
+- ONLY generate the dialogue text after each [SPEAKER|emotion] tag
+- DO NOT include any technical information, voice model names, or prosody details in the dialogue
+- DO NOT say things like "using voice model" or "with prosody rate"
+- DO NOT use markdown formatting (no **bold**, *italic*, or other markdown)
+- Write plain text only - no asterisks, underscores, or special formatting
+- The dialogue should be natural conversation that people would actually say
+- Keep it conversational and engaging
+- Use varied emotions throughout
+- Include engaging questions and answers
+- End with a proper closing
+- Keep segments under 400 words each
+
+Generate ONLY the podcast dialogue script now (no explanations, no metadata, just the script):"""
+
+# Template scripts used when Gemini is unavailable; {topic} is filled in
+_PROFESSIONAL_TEMPLATE = """[HOST|greeting] Welcome to our podcast. Today, we're exploring {topic}.
+
+[HOST|calm] I'm joined by our expert guest to discuss this fascinating subject.
+
+[GUEST|greeting] Thank you for having me. I'm excited to share insights about {topic}.
+
+[HOST|questioning] Let's start with the fundamentals. What exactly is {topic}?
+
+[GUEST|explaining] {topic} is a complex and evolving field that encompasses multiple dimensions. At its core, it represents a significant area of innovation and development.
+
+[HOST|intrigued] That's a great foundation. Can you provide a concrete example?
+
+[GUEST|storytelling] Absolutely. Consider how {topic} impacts our daily lives through various applications and use cases.
+
+[HOST|thoughtful] I see. What are the key challenges or considerations people should be aware of?
+
+[GUEST|serious] There are several important factors. First, we need to consider the technical aspects. Second, the practical implications. And third, the broader societal impact.
+
+[HOST|questioning] What does the future hold for {topic}?
+
+[GUEST|optimistic] The future is incredibly promising. We're seeing rapid advancement and innovation across multiple fronts.
+
+[HOST|grateful] This has been incredibly insightful. Thank you for sharing your expertise.
+
+[GUEST|warm] My pleasure. Thank you for the thoughtful discussion.
+
+[HOST|closing] That's all for today. Join us next time for more fascinating conversations."""
+
+_CASUAL_TEMPLATE = """[HOST|enthusiastic] Hey everyone! Welcome back to the show. Today we're talking about {topic}.
+
+[CO-HOST|excited] Oh man, I've been looking forward to this one!
+
+[HOST|questioning] So what got you interested in {topic}?
+
+[CO-HOST|storytelling] Funny story actually. I stumbled upon it while...
+
+[HOST|intrigued] No way! That's amazing.
+
+[CO-HOST|explaining] Right? So basically, {topic} is all about...
+
+[HOST|amazed] Wow, I had no idea it was that deep.
+
+[CO-HOST|calm] Yeah, there's a lot more to it than people think.
+
+[HOST|questioning] What's the coolest thing about {topic}?
+
+[CO-HOST|excited] Oh, definitely how it connects to everyday life!
+
+[HOST|grateful] Thanks for breaking that down! Super helpful.
+
+[CO-HOST|warm] Anytime! This was fun.
+
+[HOST|closing] Alright folks, that's it for today. Catch you next time!"""
+
+_EDUCATIONAL_TEMPLATE = """[NARRATOR|calm] Welcome to our educational series. Today's topic: {topic}.
+
+[NARRATOR|explaining] To understand {topic}, we must first establish the foundational concepts.
+
+[NARRATOR|thoughtful] Let's begin with a definition. {topic} refers to...
+
+[NARRATOR|explaining] Now, consider the key components. First, we have... Second, there's... And third...
+
+[NARRATOR|storytelling] To illustrate this with a real-world example...
+
+[NARRATOR|serious] It's important to note the implications and limitations.
+
+[NARRATOR|optimistic] However, the potential applications are extensive.
+
+[NARRATOR|explaining] In summary, {topic} represents a significant area of study with far-reaching consequences.
+
+[NARRATOR|closing] Thank you for learning with us today. Until next time."""
+
+_ENTERTAINING_TEMPLATE = """[HOST|excited] Alright, buckle up folks! Today we're diving into the wild world of {topic}!
+
+[HOST|storytelling] Picture this: You're sitting there, minding your own business, when suddenly...
+
+[GUEST|amazed] Wait, seriously? That's crazy!
+
+[HOST|enthusiastic] I know, right? But here's where it gets even better.
+
+[GUEST|intrigued] Tell me more!
+
+[HOST|explaining] So {topic} is basically like... imagine if X met Y at a party.
+
+[GUEST|excited] Ha! That's the perfect analogy.
+
+[HOST|questioning] But seriously, what makes {topic} so special?
+
+[GUEST|thoughtful] Well, beyond the entertainment value, there's actually some deep stuff here.
+
+[HOST|amazed] Whoa, mind blown.
+
+[GUEST|warm] That's what makes it so fascinating.
+
+[HOST|grateful] This was awesome! Thanks for the chat.
+
+[GUEST|enthusiastic] Anytime! This was a blast.
+
+[HOST|closing] And that's a wrap! See you next time, folks!"""
+
+_TEMPLATES_BY_TONE = MappingProxyType({
+    'professional': _PROFESSIONAL_TEMPLATE,
+    'casual': _CASUAL_TEMPLATE,
+    'educational': _EDUCATIONAL_TEMPLATE,
+    'entertaining': _ENTERTAINING_TEMPLATE,
+})
+
+# Edge TTS failures worth retrying: timeouts, dropped connections, throttling
+_TRANSIENT_TTS_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    aiohttp.ClientError,
+    NoAudioReceived,
+    WebSocketError,
+)
+
+# Max new Edge TTS requests started per second, to stay clear of throttling
+TTS_REQUESTS_PER_SECOND = 10
+
+# On-disk cache of synthesized lines, keyed by (voice, cleaned text)
+TTS_CACHE_MAX_FILES = 2000
+TTS_CACHE_TRIM_EVERY = 100  # cache writes between eviction sweeps
+
 
 class PodcastGenerator:
     """Professional podcast generator with Edge TTS"""
     
-    def __init__(self, output_dir='output'):
+    def __init__(self, output_dir='output', max_concurrency=MAX_CONCURRENT_SEGMENTS):
         """
         Initialize podcast generator
         
         Args:
             output_dir (str): Directory for output files
+            max_concurrency (int): Max Edge TTS requests in flight at once
         """
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-        self.temp_files = []
+        self.tts_cache_dir = os.path.join(output_dir, '.tts_cache')
+        os.makedirs(self.tts_cache_dir, exist_ok=True)
+        self._tts_cache_writes = 0
+        self.max_concurrency = max_concurrency
+        self.pool = RequestPool(max_concurrency)
+        self._bucket = AsyncTokenBucket(TTS_REQUESTS_PER_SECOND)
     
     async def generate_from_script(self, script_text, custom_voices=None, 
-                                   output_filename=None, add_pauses=True, language='en-US'):
+                                   output_filename=None, add_pauses=True, language='en-US',
+                                   _trusted=False):
         """
         Generate podcast from script text
         
@@ -52,111 +294,386 @@ class PodcastGenerator:
             output_filename (str): Output filename (auto-generated if None)
             add_pauses (bool): Add pauses between speakers
             language (str): Language code for voice selection
+            _trusted (bool): Script came from generate_template_script; skip validation
             
         Returns:
             str: Path to generated podcast file
         """
-        print("🎙️ Starting podcast generation...")
+        logger.info("🎙️ Starting podcast generation...")
         
         # 1. Parse script
-        print("📝 Parsing script...")
+        logger.info("📝 Parsing script...")
         segments = parse_podcast_script(script_text)
         
+        return await self.generate_from_segments(
+            segments,
+            custom_voices=custom_voices,
+            output_filename=output_filename,
+            add_pauses=add_pauses,
+            language=language,
+            _trusted=_trusted
+        )
+    
+    async def generate_from_segments(self, segments, custom_voices=None,
+                                     output_filename=None, add_pauses=True, language='en-US',
+                                     _trusted=False):
+        """
+        Generate podcast from already-parsed script segments
+        
+        Args:
+            segments (list): Segments from parse_podcast_script
+            custom_voices (dict): Optional custom voice mapping
+            output_filename (str): Output filename (auto-generated if None)
+            add_pauses (bool): Add pauses between speakers
+            language (str): Language code for voice selection
+            _trusted (bool): Segments come from a generated script; skip validation
+            
+        Returns:
+            str: Path to generated podcast file
+        """
         if not segments:
             raise ValueError("No valid segments found in script")
         
-        # Validate script
-        is_valid, error_msg = validate_script(segments)
-        if not is_valid:
-            raise ValueError(f"Script validation failed: {error_msg}")
+        # Validate user-supplied scripts; generated ones follow the format by
+        # construction, and long segments are split before synthesis anyway
+        if not _trusted:
+            is_valid, error_msg = validate_script(segments)
+            if not is_valid:
+                raise ValueError(f"Script validation failed: {error_msg}")
         
-        print(f"   Found {len(segments)} segments")
+        logger.info("   Found %d segments", len(segments))
         
         # 2. Assign voices
-        print("🎤 Assigning voices...")
+        logger.info("🎤 Assigning voices...")
         segments = assign_voices_to_script(segments, custom_voices, language)
         
-        # 3. Generate audio for each segment
-        print("🔊 Generating audio segments...")
-        segment_files = await self._generate_segments(segments, add_pauses)
-        
-        # 4. Merge segments
-        print("🔗 Merging segments...")
-        merged_path = tempfile.NamedTemporaryFile(
-            delete=False, suffix='_merged.mp3', dir=self.output_dir
-        ).name
-        self.temp_files.append(merged_path)
+        # 3-4. Generate audio for each segment, merging as segments finish
+        logger.info("🔊 Generating audio segments...")
+        merged = await self._generate_segments(segments, add_pauses)
         
-        merge_audio_segments(segment_files, merged_path, crossfade_ms=50)
-        
-        # 5. Apply master processing
-        print("✨ Applying master processing...")
+        # 5. Apply master processing (CPU-bound, so off the event loop)
+        logger.info("✨ Applying master processing...")
         
         if output_filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_filename = f"podcast_{timestamp}.mp3"
         
         output_path = os.path.join(self.output_dir, output_filename)
-        apply_master_processing(merged_path, output_path)
         
-        # 6. Cleanup temp files
-        self._cleanup_temp_files()
+        # Work in a per-render temp dir that is removed as a whole, even on
+        # errors; the finished file is moved into place so readers never
+        # see a partial podcast
+        with tempfile.TemporaryDirectory(dir=self.output_dir, prefix="podcast_") as tmp:
+            tmp_output = os.path.join(tmp, 'master.mp3')
+            await asyncio.to_thread(master_mp3_bytes, merged, tmp_output)
+            shutil.move(tmp_output, output_path)
         
         duration = get_audio_duration(output_path)
-        print(f"✅ Podcast generated successfully!")
-        print(f"   Output: {output_path}")
-        print(f"   Duration: {duration:.1f} seconds")
+        logger.info(
+            "✅ Podcast generated successfully!\n   Output: %s\n   Duration: %.1f seconds",
+            output_path, duration
+        )
         
         return output_path
     
-    async def _generate_segments(self, segments, add_pauses=True):
+    def stream_from_segments(self, segments, custom_voices=None, language='en-US',
+                             add_pauses=True):
         """
-        Generate audio for all segments
+        Stream podcast audio from already-parsed segments as it is synthesized
+        
+        The segments are validated up front so errors surface before any
+        audio is sent. Master processing is not applied, since it needs the
+        complete audio.
         
         Args:
-            segments (list): Parsed segments with voice assignments
+            segments (list): Segments from parse_podcast_script
+            custom_voices (dict): Optional custom voice mapping
+            language (str): Language code for voice selection
+            add_pauses (bool): Add pauses between speakers
+            
+        Returns:
+            async generator: MP3 byte chunks in playback order
+        """
+        if not segments:
+            raise ValueError("No valid segments found in script")
+        
+        is_valid, error_msg = validate_script(segments)
+        if not is_valid:
+            raise ValueError(f"Script validation failed: {error_msg}")
+        
+        segments = assign_voices_to_script(segments, custom_voices, language)
+        return self._stream_segments(_iter_segments(segments), add_pauses)
+    
+    def stream_from_topic(self, topic, duration_minutes=5, tone='professional',
+                          key_points=None, language='en-US', custom_voices=None,
+                          add_pauses=True):
+        """
+        Stream podcast audio for a topic while its script is still being written
+        
+        Each segment goes to TTS as soon as the script generator emits it,
+        so the first audio arrives after the first script line plus one TTS
+        round-trip instead of after the whole script.
+        
+        Args:
+            topic (str): Podcast topic
+            duration_minutes (int): Target duration
+            tone (str): Tone (professional, casual, educational, entertaining)
+            key_points (list): Optional list of key points to cover
+            language (str): Target language code
+            custom_voices (dict): Optional custom voice mapping
+            add_pauses (bool): Add pauses between speakers
+            
+        Returns:
+            async generator: MP3 byte chunks in playback order
+        """
+        async def voiced_segments():
+            async for segment in self.stream_script_segments(
+                topic, duration_minutes, tone, key_points, language
+            ):
+                yield assign_voices_to_script([segment], custom_voices, language)[0]
+        
+        return self._stream_segments(voiced_segments(), add_pauses)
+    
+    async def _stream_segments(self, segments, add_pauses=True):
+        """
+        Yield audio for each segment as soon as it and all earlier ones are ready
+        
+        Segments are synthesized concurrently through the request pool and
+        emitted in order. They are submitted as the source produces them, so
+        synthesis can start before the whole script exists. MP3 frames from
+        consecutive segments concatenate into a valid stream. Speaker
+        changes get the same 300ms pause as batch renders.
+        
+        Args:
+            segments: Async iterable of segments with voice assignments
             add_pauses (bool): Add pauses between different speakers
             
+        Yields:
+            bytes: MP3 audio for one segment
+        """
+        request_id = uuid.uuid4().hex
+        pending = asyncio.Queue()
+        
+        async def submit_all():
+            i = 0
+            previous_speaker = None
+            try:
+                async for segment in segments:
+                    # Pause before the first piece of a new speaker's segment,
+                    # i.e. where _generate_segments puts it
+                    if add_pauses and i > 0 and segment['speaker'] != previous_speaker:
+                        pause = asyncio.get_running_loop().create_future()
+                        pause.set_result(silence_mp3(300))
+                        pending.put_nowait(pause)
+                    previous_speaker = segment['speaker']
+                    
+                    for sub_segment in split_long_segment(segment, max_words=400):
+                        # Same path as batch renders: text cleanup plus retries
+                        # with backoff, so one transient TTS error doesn't end
+                        # the stream partway through
+                        pending.put_nowait(self.pool.submit(
+                            request_id,
+                            lambda i=i, sub_segment=sub_segment: self._generate_single_segment(
+                                sub_segment['text'],
+                                sub_segment['emotion'],
+                                sub_segment['voice_id'],
+                                segment_num=i
+                            )
+                        ))
+                    i += 1
+            finally:
+                pending.put_nowait(None)
+        
+        producer = asyncio.ensure_future(submit_all())
+        try:
+            while True:
+                future = await pending.get()
+                if future is None:
+                    break
+                yield await future
+            
+            # Surface errors from the segment source (e.g. script generation)
+            await producer
+        finally:
+            # Client went away or a segment failed: stop submitting, and drop
+            # this request's queued and in-flight TTS jobs
+            producer.cancel()
+            self.pool.cancel(request_id)
+    
+    async def _synthesize_to_bytes(self, text, voice_id, label='request'):
+        """
+        Synthesize text with Edge TTS into memory, reusing cached audio
+        
+        Transient failures are retried with backoff; each attempt takes a
+        rate-limit token before its timeout starts.
+        
+        Args:
+            text (str): Text to speak
+            voice_id (str): Edge TTS voice ID
+            label (str): Name used in retry log messages
+            
         Returns:
-            list: List of generated audio file paths
+            bytes: MP3 audio
+        """
+        key = hashlib.sha256(f"{voice_id}\0{text}".encode()).hexdigest()
+        cache_path = os.path.join(self.tts_cache_dir, f"{key}.mp3")
+        
+        # Cache file I/O runs off the event loop, which serves every request
+        audio = await asyncio.to_thread(self._read_tts_cache, cache_path)
+        if audio is not None:
+            return audio
+        
+        # Each attempt uses a new communicate object
+        audio = await _with_retry(
+            lambda: self._stream_tts(text, voice_id),
+            before_attempt=self._bucket.acquire,
+            label=label
+        )
+        
+        if audio:
+            await asyncio.to_thread(self._store_tts_cache, cache_path, audio)
+        return audio
+    
+    async def _stream_tts(self, text, voice_id):
         """
-        segment_files = []
+        Run one Edge TTS call, collecting the streamed audio in memory
         
-        for i, segment in enumerate(segments):
-            print(f"   Segment {i+1}/{len(segments)}: {segment['speaker']} ({segment['emotion']})")
+        Args:
+            text (str): Text to speak
+            voice_id (str): Edge TTS voice ID
             
-            # Split long segments if needed
-            split_segments = split_long_segment(segment, max_words=400)
+        Returns:
+            bytes: MP3 audio
+        """
+        audio = bytearray()
+        async for chunk in new_communicate(text, voice_id).stream():
+            if chunk['type'] == 'audio':
+                audio.extend(chunk['data'])
+        return bytes(audio)
+    
+    def _read_tts_cache(self, cache_path):
+        """
+        Read audio from the TTS cache, marking it as recently used
+        
+        Args:
+            cache_path (str): Cache file path
             
-            for sub_segment in split_segments:
-                # Generate audio for segment
-                audio_file = await self._generate_single_segment(
-                    sub_segment['text'],
-                    sub_segment['emotion'],
-                    sub_segment['voice_id'],
-                    segment_num=i
-                )
-                
-                segment_files.append(audio_file)
+        Returns:
+            bytes: MP3 audio, or None on a miss
+        """
+        try:
+            with open(cache_path, 'rb') as f:
+                audio = f.read()
+            os.utime(cache_path)  # Mark as recently used for eviction
+            return audio
+        except FileNotFoundError:
+            return None
+    
+    def _store_tts_cache(self, cache_path, audio):
+        """
+        Save synthesized audio to the TTS cache, evicting old entries now and then
+        
+        Args:
+            cache_path (str): Cache file path
+            audio (bytes): MP3 audio
+        """
+        try:
+            # Write to a private file first so readers never see a partial MP3
+            partial_path = f"{cache_path}.{uuid.uuid4().hex}.part"
+            with open(partial_path, 'wb') as f:
+                f.write(audio)
+            os.replace(partial_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not cache TTS audio: %s", e)
+            return
+        
+        self._tts_cache_writes += 1
+        if self._tts_cache_writes % TTS_CACHE_TRIM_EVERY == 0:
+            self._trim_tts_cache()
+    
+    def _trim_tts_cache(self):
+        """Delete least recently used TTS cache entries beyond TTS_CACHE_MAX_FILES"""
+        try:
+            entries = [
+                entry for entry in os.scandir(self.tts_cache_dir)
+                if entry.name.endswith('.mp3')
+            ]
+            if len(entries) <= TTS_CACHE_MAX_FILES:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_atime)
+            for entry in entries[:len(entries) - TTS_CACHE_MAX_FILES]:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.warning("Could not trim TTS cache: %s", e)
+    
+    async def _generate_segments(self, segments, add_pauses=True):
+        """
+        Generate audio for all segments and merge it
+        
+        Segments are spliced into the merge as their TTS calls finish, so
+        merging overlaps with generation instead of following it.
+        
+        Args:
+            segments (list): Parsed segments with voice assignments
+            add_pauses (bool): Add pauses between different speakers
             
-            # Add pause between different speakers (skip if ffmpeg not available)
-            if add_pauses and i < len(segments) - 1:
-                next_speaker = segments[i + 1]['speaker']
-                if next_speaker != segment['speaker']:
-                    try:
-                        # Different speaker = add 300ms pause
-                        pause_file = tempfile.NamedTemporaryFile(
-                            delete=False, suffix=f'_pause_{i}.mp3', dir=self.output_dir
-                        ).name
-                        self.temp_files.append(pause_file)
-                        
-                        pause_result = create_silence(300, pause_file)
-                        if pause_result:  # Only add if creation succeeded
-                            segment_files.append(pause_result)
-                    except Exception as e:
-                        print(f"Warning: Skipping pause due to: {e}")
-        
-        return segment_files
+        Returns:
+            bytes: Merged MP3 data (sub-segments and pauses, in order)
+        """
+        # Flatten into (segment index, sub-segment) jobs so a long segment's
+        # pieces run in parallel too instead of back to back
+        jobs = [
+            (i, sub_segment)
+            for i, segment in enumerate(segments)
+            for sub_segment in split_long_segment(segment, max_words=400)
+        ]
+        
+        def synth(i, sub_segment):
+            return self._generate_single_segment(
+                sub_segment['text'],
+                sub_segment['emotion'],
+                sub_segment['voice_id'],
+                segment_num=i
+            )
+        
+        logger.info("\n".join(
+            f"   Segment {i+1}/{len(segments)}: {segment['speaker']} ({segment['emotion']})"
+            for i, segment in enumerate(segments)
+        ))
+        
+        merger = SegmentMerger()
+        
+        # Edge TTS calls are independent websocket round-trips, so overlap them.
+        # The shared request pool bounds how many run at once across requests.
+        request_id = uuid.uuid4().hex
+        futures = []
+        slot = 0
+        
+        for n, (i, sub_segment) in enumerate(jobs):
+            future = self.pool.submit(
+                request_id, lambda i=i, sub_segment=sub_segment: synth(i, sub_segment)
+            )
+            futures.append((slot, future))
+            slot += 1
+            
+            # Add a 300ms pause (shared, precomputed frames) after a segment's
+            # last piece when the next segment has a different speaker
+            last_piece = n == len(jobs) - 1 or jobs[n + 1][0] != i
+            if add_pauses and last_piece and i < len(segments) - 1:
+                if segments[i + 1]['speaker'] != segments[i]['speaker']:
+                    merger.put(slot, silence_mp3(300))
+                    slot += 1
+        
+        async def merge_when_done(slot, future):
+            merger.put(slot, await future)
+        
+        try:
+            await asyncio.gather(*(merge_when_done(slot, future) for slot, future in futures))
+        finally:
+            # On failure, drop this render's queued and in-flight TTS jobs
+            self.pool.cancel(request_id)
+        
+        return merger.getvalue()
     
     async def _generate_single_segment(self, text, emotion, voice_id, segment_num=0):
         """
@@ -166,10 +683,10 @@ class PodcastGenerator:
             text (str): Text to speak
             emotion (str): Emotion to apply
             voice_id (str): Edge TTS voice ID
-            segment_num (int): Segment number for filename
+            segment_num (int): Segment number for log messages
             
         Returns:
-            str: Path to generated audio file
+            bytes: Generated MP3 audio
         """
         try:
             # Clean text to remove any metadata or technical terms
@@ -178,42 +695,23 @@ class PodcastGenerator:
             
             # Validate text is not empty after cleaning
             if not text or len(text.strip()) == 0:
-                print(f"      Warning: Text empty after cleaning. Using original.")
-                print(f"      Original: {original_text[:100]}")
+                logger.warning("      Text empty after cleaning. Using original: %s", original_text[:100])
                 text = original_text
             
-            print(f"      Generating audio for: {text[:50]}...")
-            print(f"      Voice ID: {voice_id}")
-            
-            # Generate audio with Edge TTS (plain text - SSML can cause hanging)
-            temp_file = tempfile.NamedTemporaryFile(
-                delete=False, suffix=f'_seg_{segment_num}.mp3', dir=self.output_dir
-            ).name
-            self.temp_files.append(temp_file)
+            logger.info("      Generating audio for: %s... (voice %s)", text[:50], voice_id)
             
-            # Use plain text instead of SSML to avoid hanging issues
-            communicate = edge_tts.Communicate(text, voice_id)
+            # Generate audio with Edge TTS (plain text - SSML can cause hanging),
+            # collecting the streamed chunks in memory instead of a temp file
+            audio = await self._synthesize_to_bytes(text, voice_id, label=f"segment {segment_num}")
             
-            # Add timeout protection
-            import asyncio
-            try:
-                await asyncio.wait_for(communicate.save(temp_file), timeout=30.0)
-            except asyncio.TimeoutError:
-                print(f"      Timeout on segment {segment_num}, retrying...")
-                # Retry once with a new communicate object
-                communicate = edge_tts.Communicate(text, voice_id)
-                await asyncio.wait_for(communicate.save(temp_file), timeout=30.0)
-            
-            print(f"      ✓ Audio saved to {os.path.basename(temp_file)}")
+            logger.info("      ✓ Audio generated for segment %d (%d bytes)", segment_num, len(audio))
             
             # Skip audio effects (can cause hanging)
-            # apply_audio_effects(temp_file, emotion)
+            # apply_audio_effects(audio, emotion)
             
-            return temp_file
+            return audio
         except Exception as e:
-            print(f"Error generating segment {segment_num}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error generating segment %d: %s", segment_num, e)
             raise
     
     def _clean_text_for_speech(self, text):
@@ -226,65 +724,19 @@ class PodcastGenerator:
         Returns:
             str: Cleaned text ready for TTS
         """
-        import re
-        
-        # Remove markdown formatting (bold, italic, etc.)
-        text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)  # **bold**
-        text = re.sub(r'\*([^*]+)\*', r'\1', text)       # *italic*
-        text = re.sub(r'__([^_]+)__', r'\1', text)       # __bold__
-        text = re.sub(r'_([^_]+)_', r'\1', text)         # _italic_
-        text = re.sub(r'~~([^~]+)~~', r'\1', text)       # ~~strikethrough~~
-        
-        # Remove XML/SSML tags completely (including their content)
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Remove XML attributes and namespaces
-        text = re.sub(r'xmlns[:\w]*\s*=\s*["\'][^"\']*["\']', '', text)
-        
-        # Remove any remaining speaker tags if present
-        text = re.sub(r'\[([A-Z\-]+)\|(\w+)\]\s*', '', text)
-        
-        # Remove technical terms that might have leaked in
-        technical_patterns = [
-            r'xmlns[\w\s:="\'/.]*',
-            r'voice\s+model[:\s]+[\w\-]+',
-            r'prosody\s+rate[:\s]+[\+\-]?\d+%',
-            r'prosody[:\s]+[\+\-]?\d+%',
-            r'pitch[:\s]+[\+\-]?\d+%',
-            r'volume[:\s]+[\+\-]?\d+dB',
-            r'with\s+prosody\s+',
-            r'using\s+voice\s+',
-            r'rate\s+of\s+[\+\-]?\d+%',
-            r'voice\s+name[:\s]+[\w\-]+',
-            r'speak\s+version[:\s]+[\d\.]+',
-        ]
-        
-        for pattern in technical_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+        for pattern, replacement in _CLEANUP_PATTERNS:
+            text = pattern.sub(replacement, text)
         
         # Clean up extra whitespace
-        text = ' '.join(text.split())
-        
-        cleaned = text.strip()
+        cleaned = _WS_RE.sub(' ', text).strip()
         
         # If cleaning removed everything, return some fallback
         if not cleaned or len(cleaned) < 5:
-            print(f"Warning: Text too short after cleaning: '{cleaned}'")
+            logger.warning("Text too short after cleaning: %r", cleaned)
             return "Hello."  # Safe fallback
         
         return cleaned
     
-    def _cleanup_temp_files(self):
-        """Clean up temporary files"""
-        for temp_file in self.temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            except Exception as e:
-                print(f"Warning: Could not delete temp file {temp_file}: {e}")
-        
-        self.temp_files = []
-    
     def generate_template_script(self, topic, duration_minutes=5, tone='professional', key_points=None, language='en-US'):
         """
         Generate a podcast script using Google Gemini AI
@@ -306,23 +758,67 @@ class PodcastGenerator:
             try:
                 return self._generate_with_gemini(topic, duration_minutes, tone, key_points, language)
             except Exception as e:
-                print(f"Warning: Gemini API failed ({e}), falling back to template")
+                logger.warning("Gemini API failed (%s), falling back to template", e)
         else:
-            print("Warning: GEMINI_API_KEY not found, using template generation")
+            logger.warning("GEMINI_API_KEY not found, using template generation")
         
         # Fallback to template generation
-        target_words = duration_minutes * 150
+        return self._generate_fallback_script(topic, duration_minutes, tone)
+    
+    async def stream_script_segments(self, topic, duration_minutes=5, tone='professional',
+                                     key_points=None, language='en-US'):
+        """
+        Generate a podcast script and yield its segments as they are written
         
-        if tone == 'professional':
-            script = self._generate_professional_script(topic, target_words)
-        elif tone == 'casual':
-            script = self._generate_casual_script(topic, target_words)
-        elif tone == 'educational':
-            script = self._generate_educational_script(topic, target_words)
-        else:  # entertaining
-            script = self._generate_entertaining_script(topic, target_words)
+        Uses Gemini's streaming API when available. Falls back to the
+        template scripts if Gemini fails before producing any segment.
         
-        return script
+        Args:
+            topic (str): Podcast topic
+            duration_minutes (int): Target duration
+            tone (str): Tone (professional, casual, educational, entertaining)
+            key_points (list): Optional list of key points to cover
+            language (str): Target language code
+            
+        Yields:
+            dict: Parsed segment with speaker, emotion, text
+        """
+        if os.getenv('GEMINI_API_KEY'):
+            emitted = False
+            try:
+                async for segment in self._stream_with_gemini(
+                    topic, duration_minutes, tone, key_points, language
+                ):
+                    emitted = True
+                    yield segment
+                return
+            except Exception as e:
+                # Audio for earlier segments is already out; can't switch scripts now
+                if emitted:
+                    raise
+                logger.warning("Gemini API failed (%s), falling back to template", e)
+        else:
+            logger.warning("GEMINI_API_KEY not found, using template generation")
+        
+        script = self._generate_fallback_script(topic, duration_minutes, tone)
+        for segment in parse_podcast_script(script):
+            yield segment
+    
+    def _generate_fallback_script(self, topic, duration_minutes, tone):
+        """
+        Generate a template script for the given tone
+        
+        Args:
+            topic (str): Podcast topic
+            duration_minutes (int): Target duration
+            tone (str): Podcast tone
+            
+        Returns:
+            str: Template podcast script
+        """
+        # Unknown tones get the entertaining template
+        template = _TEMPLATES_BY_TONE.get(tone, _ENTERTAINING_TEMPLATE)
+        return template.format(topic=topic)
     
     def _generate_with_gemini(self, topic, duration_minutes, tone, key_points=None, language='en-US'):
         """
@@ -338,213 +834,197 @@ class PodcastGenerator:
         Returns:
             str: Generated podcast script
         """
-        # Configure Gemini
-        api_key = os.getenv('GEMINI_API_KEY')
-        genai.configure(api_key=api_key)
-        
-        # Estimate words needed (150 words per minute)
-        target_words = duration_minutes * 150
+        prompt = self._build_gemini_prompt(topic, duration_minutes, tone, key_points, language)
         
-        # Build key points section
-        key_points_text = ""
-        if key_points and len(key_points) > 0:
-            key_points_text = f"\n- Cover these key points: {', '.join(key_points)}"
-        
-        # Language instruction
-        language_names = {
-            'en-US': 'English',
-            'es-ES': 'Spanish',
-            'fr-FR': 'French',
-            'de-DE': 'German',
-            'it-IT': 'Italian',
-            'pt-BR': 'Portuguese',
-            'hi-IN': 'Hindi',
-            'zh-CN': 'Chinese',
-            'ja-JP': 'Japanese',
-            'ko-KR': 'Korean',
-            'ar-SA': 'Arabic',
-            'ru-RU': 'Russian',
-            'ta-IN': 'Tamil',
-            'te-IN': 'Telugu',
-            'ml-IN': 'Malayalam',
-            'bn-IN': 'Bengali'
-        }
-        language_name = language_names.get(language, 'English')
-        language_instruction = f"\n- Generate the script in {language_name} language" if language != 'en-US' else ""
-        
-        # Create prompt based on tone
-        tone_instructions = {
-            'professional': 'professional interview style with expert analysis',
-            'casual': 'casual, friendly conversation between friends',
-            'educational': 'educational lecture format with clear explanations',
-            'entertaining': 'entertaining and engaging debate or discussion'
-        }
-        
-        tone_style = tone_instructions.get(tone, 'conversational')
-        
-        prompt = f"""Generate a podcast script about: {topic}
-
-Requirements:
-- Style: {tone_style}
-- Target length: approximately {target_words} words (for {duration_minutes} minutes at 150 words/minute)
-- Format: Use [SPEAKER|emotion] before each line{key_points_text}{language_instruction}
-
-Available speakers: HOST, GUEST, CO-HOST, NARRATOR
-Available emotions: enthusiastic, calm, questioning, explaining, excited, thoughtful, serious, grateful, intrigued, amazed, greeting, closing, warm, optimistic, storytelling
-
-Format example:
-[HOST|enthusiastic] Welcome to our podcast! Today we're exploring {topic}.
-[GUEST|calm] Thanks for having me. I'm excited to discuss this topic.
-[HOST|questioning] Let's start with the basics...
-
-CRITICAL INSTRUCTIONS:
-- ONLY generate the dialogue text after each [SPEAKER|emotion] tag
-- DO NOT include any technical information, voice model names, or prosody details in the dialogue
-- DO NOT say things like "using voice model" or "with prosody rate"
-- DO NOT use markdown formatting (no **bold**, *italic*, or other markdown)
-- Write plain text only - no asterisks, underscores, or special formatting
-- The dialogue should be natural conversation that people would actually say
-- Keep it conversational and engaging
-- Use varied emotions throughout
-- Include engaging questions and answers
-- End with a proper closing
-- Keep segments under 400 words each
-
-Generate ONLY the podcast dialogue script now (no explanations, no metadata, just the script):"""
-
         try:
             # Use Gemini to generate content
-            model = genai.GenerativeModel('gemini-2.5-flash')
+            model = _get_gemini_model(os.getenv('GEMINI_API_KEY'))
             response = model.generate_content(prompt)
             
             script = response.text
             
             # Ensure script has proper format
             if '[' not in script or '|' not in script:
-                print("Warning: Gemini response missing script format, adding structure")
+                logger.warning("Gemini response missing script format, adding structure")
                 script = f"[HOST|enthusiastic] {script}"
             
-            print(f"✓ Generated script with Gemini AI ({len(script)} characters)")
+            logger.info("✓ Generated script with Gemini AI (%d characters)", len(script))
             return script
             
         except Exception as e:
             raise Exception(f"Gemini API error: {str(e)}")
     
-    def _generate_professional_script(self, topic, target_words):
-        """Generate professional interview-style script"""
-        script = f"""[HOST|greeting] Welcome to our podcast. Today, we're exploring {topic}.
-
-[HOST|calm] I'm joined by our expert guest to discuss this fascinating subject.
-
-[GUEST|greeting] Thank you for having me. I'm excited to share insights about {topic}.
-
-[HOST|questioning] Let's start with the fundamentals. What exactly is {topic}?
-
-[GUEST|explaining] {topic} is a complex and evolving field that encompasses multiple dimensions. At its core, it represents a significant area of innovation and development.
-
-[HOST|intrigued] That's a great foundation. Can you provide a concrete example?
-
-[GUEST|storytelling] Absolutely. Consider how {topic} impacts our daily lives through various applications and use cases.
-
-[HOST|thoughtful] I see. What are the key challenges or considerations people should be aware of?
-
-[GUEST|serious] There are several important factors. First, we need to consider the technical aspects. Second, the practical implications. And third, the broader societal impact.
-
-[HOST|questioning] What does the future hold for {topic}?
-
-[GUEST|optimistic] The future is incredibly promising. We're seeing rapid advancement and innovation across multiple fronts.
-
-[HOST|grateful] This has been incredibly insightful. Thank you for sharing your expertise.
-
-[GUEST|warm] My pleasure. Thank you for the thoughtful discussion.
-
-[HOST|closing] That's all for today. Join us next time for more fascinating conversations."""
+    async def _stream_with_gemini(self, topic, duration_minutes, tone, key_points=None, language='en-US'):
+        """
+        Stream a podcast script from Google Gemini, one segment at a time
         
-        return script
-    
-    def _generate_casual_script(self, topic, target_words):
-        """Generate casual conversation-style script"""
-        script = f"""[HOST|enthusiastic] Hey everyone! Welcome back to the show. Today we're talking about {topic}.
-
-[CO-HOST|excited] Oh man, I've been looking forward to this one!
-
-[HOST|questioning] So what got you interested in {topic}?
-
-[CO-HOST|storytelling] Funny story actually. I stumbled upon it while...
-
-[HOST|intrigued] No way! That's amazing.
-
-[CO-HOST|explaining] Right? So basically, {topic} is all about...
-
-[HOST|amazed] Wow, I had no idea it was that deep.
-
-[CO-HOST|calm] Yeah, there's a lot more to it than people think.
-
-[HOST|questioning] What's the coolest thing about {topic}?
-
-[CO-HOST|excited] Oh, definitely how it connects to everyday life!
-
-[HOST|grateful] Thanks for breaking that down! Super helpful.
-
-[CO-HOST|warm] Anytime! This was fun.
-
-[HOST|closing] Alright folks, that's it for today. Catch you next time!"""
+        A segment is yielded once the next [SPEAKER|emotion] tag has
+        arrived, so its text is known to be complete.
         
-        return script
+        Args:
+            topic (str): Podcast topic
+            duration_minutes (int): Target duration
+            tone (str): Podcast tone
+            key_points (list): Optional key points to cover
+            language (str): Target language code
+            
+        Yields:
+            dict: Parsed segment with speaker, emotion, text
+        """
+        prompt = self._build_gemini_prompt(topic, duration_minutes, tone, key_points, language)
+        
+        try:
+            # The Gemini client is blocking; pull each chunk on a worker thread
+            model = _get_gemini_model(os.getenv('GEMINI_API_KEY'))
+            response = await asyncio.to_thread(model.generate_content, prompt, stream=True)
+            chunks = iter(response)
+            
+            buffer = ''
+            total_chars = 0
+            emitted = False
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                buffer += chunk.text
+                total_chars += len(chunk.text)
+                
+                # Everything before the last tag line is made of finished segments
+                cut = buffer.rfind('\n[')
+                if cut > 0:
+                    for segment in parse_podcast_script(buffer[:cut]):
+                        emitted = True
+                        yield segment
+                    buffer = buffer[cut + 1:]
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+        
+        segments = parse_podcast_script(buffer)
+        if not segments and not emitted and buffer.strip():
+            logger.warning("Gemini response missing script format, adding structure")
+            segments = parse_podcast_script(f"[HOST|enthusiastic] {buffer}")
+        for segment in segments:
+            yield segment
+        
+        logger.info("✓ Streamed script with Gemini AI (%d characters)", total_chars)
     
-    def _generate_educational_script(self, topic, target_words):
-        """Generate educational lecture-style script"""
-        script = f"""[NARRATOR|calm] Welcome to our educational series. Today's topic: {topic}.
-
-[NARRATOR|explaining] To understand {topic}, we must first establish the foundational concepts.
-
-[NARRATOR|thoughtful] Let's begin with a definition. {topic} refers to...
-
-[NARRATOR|explaining] Now, consider the key components. First, we have... Second, there's... And third...
-
-[NARRATOR|storytelling] To illustrate this with a real-world example...
-
-[NARRATOR|serious] It's important to note the implications and limitations.
-
-[NARRATOR|optimistic] However, the potential applications are extensive.
+    def _build_gemini_prompt(self, topic, duration_minutes, tone, key_points=None, language='en-US'):
+        """
+        Build the Gemini prompt for a podcast script
+        
+        Args:
+            topic (str): Podcast topic
+            duration_minutes (int): Target duration
+            tone (str): Podcast tone
+            key_points (list): Optional key points to cover
+            language (str): Target language code
+            
+        Returns:
+            str: Prompt text
+        """
+        # Estimate words needed (150 words per minute)
+        target_words = duration_minutes * 150
+        
+        # Build key points section
+        key_points_text = ""
+        if key_points and len(key_points) > 0:
+            key_points_text = f"\n- Cover these key points: {', '.join(key_points)}"
+        
+        prompt = _prompt_template(tone, language).format(
+            topic=topic,
+            target_words=target_words,
+            duration_minutes=duration_minutes,
+            key_points_text=key_points_text
+        )
+        
+        return prompt
 
-[NARRATOR|explaining] In summary, {topic} represents a significant area of study with far-reaching consequences.
 
-[NARRATOR|closing] Thank you for learning with us today. Until next time."""
+@functools.lru_cache(maxsize=64)
+def _prompt_template(tone, language):
+    """
+    Get the Gemini prompt with tone and language instructions filled in
+    
+    Args:
+        tone (str): Podcast tone
+        language (str): Target language code
         
-        return script
+    Returns:
+        str: Prompt with {topic}, {target_words}, {duration_minutes} and
+            {key_points_text} placeholders left to format
+    """
+    language_name = _LANGUAGE_NAMES.get(language, 'English')
+    language_instruction = f"\n- Generate the script in {language_name} language" if language != 'en-US' else ""
     
-    def _generate_entertaining_script(self, topic, target_words):
-        """Generate entertaining, engaging script"""
-        script = f"""[HOST|excited] Alright, buckle up folks! Today we're diving into the wild world of {topic}!
-
-[HOST|storytelling] Picture this: You're sitting there, minding your own business, when suddenly...
-
-[GUEST|amazed] Wait, seriously? That's crazy!
-
-[HOST|enthusiastic] I know, right? But here's where it gets even better.
-
-[GUEST|intrigued] Tell me more!
-
-[HOST|explaining] So {topic} is basically like... imagine if X met Y at a party.
-
-[GUEST|excited] Ha! That's the perfect analogy.
+    return _PROMPT_TEMPLATE.format(
+        tone_style=_TONE_INSTRUCTIONS.get(tone, 'conversational'),
+        language_instruction=language_instruction,
+        # Keep the per-request placeholders for the second format pass
+        topic='{topic}',
+        target_words='{target_words}',
+        duration_minutes='{duration_minutes}',
+        key_points_text='{key_points_text}'
+    )
 
-[HOST|questioning] But seriously, what makes {topic} so special?
 
-[GUEST|thoughtful] Well, beyond the entertainment value, there's actually some deep stuff here.
+@functools.lru_cache(maxsize=4)
+def _get_gemini_model(api_key, name='gemini-2.5-flash'):
+    """
+    Configure Gemini and build the model client once per API key
+    
+    Args:
+        api_key (str): Gemini API key
+        name (str): Model name
+        
+    Returns:
+        genai.GenerativeModel: Reusable model client
+    """
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(name)
 
-[HOST|amazed] Whoa, mind blown.
 
-[GUEST|warm] That's what makes it so fascinating.
-
-[HOST|grateful] This was awesome! Thanks for the chat.
+async def _with_retry(coro_factory, max_attempts=4, base=1.0, cap=8.0, timeout=30.0, label='request',
+                      before_attempt=None):
+    """
+    Run an Edge TTS call with a timeout, retrying transient failures
+    
+    Waits base * 2**attempt seconds (capped) plus jitter between attempts.
+    Throttling responses (HTTP 429) wait the full cap.
+    
+    Args:
+        coro_factory: Zero-argument function returning a fresh coroutine per attempt
+        max_attempts (int): Total attempts before giving up
+        base (float): First backoff delay in seconds
+        cap (float): Max backoff delay in seconds
+        timeout (float): Per-attempt timeout in seconds
+        label (str): Name used in log messages
+        before_attempt: Optional coroutine function awaited before each attempt,
+            outside its timeout (e.g. waiting for a rate-limit token)
+        
+    Returns:
+        The coroutine's result
+    """
+    for attempt in range(max_attempts):
+        if before_attempt is not None:
+            await before_attempt()
+        try:
+            return await asyncio.wait_for(coro_factory(), timeout=timeout)
+        except _TRANSIENT_TTS_ERRORS as e:
+            if attempt == max_attempts - 1:
+                raise
+            
+            throttled = getattr(e, 'status', None) == 429
+            delay = cap if throttled else min(cap, base * 2 ** attempt)
+            delay += random.uniform(0, 0.5)
+            reason = 'throttled' if throttled else type(e).__name__
+            logger.warning("      %s failed (%s), retrying in %.1fs...", label, reason, delay)
+            await asyncio.sleep(delay)
 
-[GUEST|enthusiastic] Anytime! This was a blast.
 
-[HOST|closing] And that's a wrap! See you next time, folks!"""
-        
-        return script
+async def _iter_segments(segments):
+    """Adapt a list of segments to the async iterable _stream_segments consumes"""
+    for segment in segments:
+        yield segment
 
 
 async def generate_podcast(script_text, output_path=None, custom_voices=None):
@@ -601,4 +1081,8 @@ if __name__ == '__main__':
         output = await generator.generate_from_script(test_script, output_filename="test_podcast.mp3")
         print(f"\n✅ Test complete! Generated: {output}")
     
-    asyncio.run(test())
+    # Run as a task when a loop is already running (e.g. Jupyter's %run)
+    try:
+        asyncio.get_running_loop().create_task(test())
+    except RuntimeError:
+        asyncio.run(test())
@@ -0,0 +1,14 @@
+#!/usr/bin/env sh
+# Production server: gunicorn with threaded workers.
+#
+# Each worker process runs its own asyncio loop for the async views, so
+# worker threads only block on their own request while TTS and Gemini calls
+# from every thread multiplex on that loop. Don't add --preload: the loop
+# thread is started at import time and would not survive the fork.
+
+exec gunicorn app:app \
+    --bind "0.0.0.0:${PORT:-5000}" \
+    --worker-class gthread \
+    --workers "${WEB_CONCURRENCY:-$(nproc)}" \
+    --threads "${GUNICORN_THREADS:-8}" \
+    --timeout "${GUNICORN_TIMEOUT:-300}"
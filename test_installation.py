@@ -5,6 +5,7 @@ Run this before starting the server to ensure everything is set up correctly
 
 import sys
 import os
+import importlib.util
 
 print("=" * 60)
 print("🎙️  Podcast Generator - Installation Test")
@@ -13,10 +14,10 @@ print()
 
 # Test 1: Python version
 print("1. Checking Python version...")
-if sys.version_info >= (3, 8):
+if sys.version_info >= (3, 11):
     print(f"   ✓ Python {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}")
 else:
-    print(f"   ✗ Python version too old. Need 3.8+, got {sys.version_info.major}.{sys.version_info.minor}")
+    print(f"   ✗ Python version too old. Need 3.11+, got {sys.version_info.major}.{sys.version_info.minor}")
     sys.exit(1)
 
 # Test 2: Required modules
@@ -29,11 +30,11 @@ required_modules = [
 ]
 
 missing_modules = []
+# find_spec only locates each module; nothing is imported or executed yet
 for module_name, display_name in required_modules:
-    try:
-        __import__(module_name)
+    if importlib.util.find_spec(module_name) is not None:
         print(f"   ✓ {display_name}")
-    except ImportError:
+    else:
         print(f"   ✗ {display_name} - NOT INSTALLED")
         missing_modules.append(module_name)
 
@@ -51,10 +52,9 @@ optional_modules = [
 ]
 
 for module_name, display_name in optional_modules:
-    try:
-        __import__(module_name)
+    if importlib.util.find_spec(module_name) is not None:
         print(f"   ✓ {display_name}")
-    except ImportError:
+    else:
         print(f"   ⚠ {display_name} - Not installed (optional, but recommended)")
 
 # Test 4: Project structure
@@ -106,7 +106,7 @@ except Exception as e:
     print(f"   ✗ Voice manager module: {e}")
 
 try:
-    from utils.audio_processor import merge_audio_segments
+    from utils.audio_processor import SegmentMerger
     print("   ✓ Audio processor module")
 except Exception as e:
     print(f"   ✗ Audio processor module: {e}")
@@ -146,10 +146,9 @@ print("\n" + "=" * 60)
 print("Installation Check Complete!")
 print("=" * 60)
 
-try:
-    import pedalboard
+if importlib.util.find_spec('pedalboard') is not None:
     audio_quality = "Professional (with audio effects)"
-except ImportError:
+else:
     audio_quality = "Basic (install pedalboard for pro audio)"
 
 print(f"""
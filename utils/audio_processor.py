@@ -3,7 +3,10 @@ Audio Processor for Professional Podcast Quality
 NO FFMPEG REQUIRED - Uses binary MP3 concatenation
 """
 
+import io
 import os
+import heapq
+import functools
 import numpy as np
 # pydub removed - no ffmpeg dependency needed!
 
@@ -49,7 +52,7 @@ def apply_audio_effects(audio_path, emotion):
     if gain_db != 0.0:
         try:
             with AudioFile(audio_path) as f:
-                audio = f.read(f.frames)
+                audio = f.read(f.frames).astype(np.float32, copy=False)
                 samplerate = f.samplerate
             
             # Apply gain adjustment
@@ -62,82 +65,97 @@ def apply_audio_effects(audio_path, emotion):
             print(f"Warning: Could not apply effects to {audio_path}: {e}")
 
 
-def apply_master_processing(input_path, output_path):
+def master_mp3_bytes(merged, output_path):
     """
-    Apply professional master chain processing
-    Same quality as current TTS system
+    Apply master processing to an in-memory MP3 and write the result
     
     Args:
-        input_path (str): Input audio file path
+        merged (bytes): MP3 data, e.g. from SegmentMerger.getvalue()
         output_path (str): Output audio file path
     """
-    if not PEDALBOARD_AVAILABLE:
-        # Fallback: just copy file if pedalboard not available
-        print("Warning: Pedalboard not available, copying file without processing")
-        from shutil import copy2
-        copy2(input_path, output_path)
-        return
-    
-    try:
-        # Load audio
-        with AudioFile(input_path) as f:
-            audio = f.read(f.frames)
-            samplerate = f.samplerate
-        
-        # Build master processing chain
-        master_board = Pedalboard([
-            # 1. Clean up background noise
-            NoiseGate(threshold_db=-45, ratio=3, release_ms=120),
-            
-            # 2. Remove low-frequency rumble
-            HighpassFilter(cutoff_frequency_hz=80),
-            
-            # 3. Gentle compression for consistency
-            Compressor(
-                threshold_db=-10,
-                ratio=1.8,
-                attack_ms=10,
-                release_ms=100
-            ),
-            
-            # 4. Subtle room ambience (very light reverb)
-            Reverb(
-                room_size=0.05,
-                damping=0.7,
-                wet_level=0.01,
-                dry_level=0.99
-            ),
-            
-            # 5. Prevent clipping with limiter
-            Limiter(threshold_db=-0.5, release_ms=100),
+    if PEDALBOARD_AVAILABLE:
+        try:
+            with AudioFile(io.BytesIO(merged)) as f:
+                audio = f.read(f.frames)
+                samplerate = f.samplerate
             
-            # 6. Final gain adjustment
-            Gain(gain_db=0.0)
-        ])
+            _write_mastered(audio, samplerate, output_path)
+            return
+        
+        except Exception as e:
+            print(f"Error in master processing: {e}")
+    else:
+        print("Warning: Pedalboard not available, writing merged audio without processing")
+    
+    # Fallback: write the unprocessed merge
+    with open(output_path, 'wb') as f:
+        f.write(merged)
+
+
+# Frames handed to the encoder per write call
+_WRITE_CHUNK_FRAMES = 1 << 16
+
+
+def _write_mastered(audio, samplerate, output_path):
+    """
+    Run decoded audio through the master chain and write it out
+    
+    Args:
+        audio (np.ndarray): Decoded audio, shape (channels, frames)
+        samplerate (float): Sample rate in Hz
+        output_path (str): Output audio file path
+    """
+    # pedalboard processes float32 natively; anything wider would be
+    # converted on every plugin call, so normalize once up front
+    audio = audio.astype(np.float32, copy=False)
+    
+    # Build master processing chain
+    master_board = Pedalboard([
+        # 1. Clean up background noise
+        NoiseGate(threshold_db=-45, ratio=3, release_ms=120),
         
-        # Process audio
-        mastered = master_board(audio, samplerate)
+        # 2. Remove low-frequency rumble
+        HighpassFilter(cutoff_frequency_hz=80),
         
-        # Convert mono to stereo if needed
-        if mastered.ndim == 1 or (mastered.ndim == 2 and mastered.shape[0] == 1):
-            if mastered.ndim == 1:
-                # Mono array to stereo
-                mastered = np.vstack([mastered, mastered])
-            else:
-                # Single channel to stereo
-                mastered = np.vstack([mastered[0], mastered[0]])
+        # 3. Gentle compression for consistency
+        Compressor(
+            threshold_db=-10,
+            ratio=1.8,
+            attack_ms=10,
+            release_ms=100
+        ),
         
-        # Save processed audio
-        with AudioFile(output_path, 'w', samplerate, mastered.shape[0]) as f:
-            f.write(mastered)
+        # 4. Subtle room ambience (very light reverb)
+        Reverb(
+            room_size=0.05,
+            damping=0.7,
+            wet_level=0.01,
+            dry_level=0.99
+        ),
         
-        print(f"✓ Master processing applied: {output_path}")
+        # 5. Prevent clipping with limiter
+        Limiter(threshold_db=-0.5, release_ms=100),
         
-    except Exception as e:
-        print(f"Error in master processing: {e}")
-        # Fallback: copy original
-        from shutil import copy2
-        copy2(input_path, output_path)
+        # 6. Final gain adjustment
+        Gain(gain_db=0.0)
+    ])
+    
+    # Process audio (pedalboard works in float32; keep it that way)
+    mastered = master_board(audio, samplerate).astype(np.float32, copy=False)
+    
+    # Convert mono to stereo if needed. broadcast_to gives a read-only
+    # (2, N) view of the one channel, so no second copy is allocated
+    if mastered.ndim == 1 or (mastered.ndim == 2 and mastered.shape[0] == 1):
+        mono = mastered if mastered.ndim == 1 else mastered[0]
+        mastered = np.broadcast_to(mono, (2, mono.shape[-1]))
+    
+    # Save processed audio. Writing in slices keeps the encoder's interleaved
+    # copy of the (possibly broadcast) stereo view to one chunk at a time
+    with AudioFile(output_path, 'w', samplerate, mastered.shape[0]) as f:
+        for start in range(0, mastered.shape[-1], _WRITE_CHUNK_FRAMES):
+            f.write(mastered[:, start:start + _WRITE_CHUNK_FRAMES])
+    
+    print(f"✓ Master processing applied: {output_path}")
 
 
 def add_background_music(podcast_path, music_path, output_path, music_volume_db=-20):
@@ -156,83 +174,124 @@ def add_background_music(podcast_path, music_path, output_path, music_volume_db=
     copy2(podcast_path, output_path)
 
 
-def merge_audio_segments(segment_files, output_path, crossfade_ms=50):
+def _id3v2_tag_size(header):
     """
-    Merge multiple MP3 segments using binary concatenation (NO FFMPEG NEEDED!)
+    Decode the tag size from an ID3v2 header
     
-    This works because MP3 is a frame-based format where each frame is independent.
-    We simply concatenate the raw MP3 data, skipping metadata headers on subsequent files.
+    The size is stored in bytes 6-9 as a synchsafe integer: 7 bits per
+    byte, top bit always clear. The masks keep a malformed header (top bit
+    set) from producing a size past what the format can express.
     
     Args:
-        segment_files (list): List of audio file paths
-        output_path (str): Output merged file path
-        crossfade_ms (int): Crossfade duration (ignored in binary mode)
+        header: At least the first 10 bytes of the tag
+        
+    Returns:
+        int: Tag size in bytes, excluding the 10-byte header
+    """
+    b6, b7, b8, b9 = header[6:10]
+    return ((b6 & 0x7f) << 21) | ((b7 & 0x7f) << 14) | ((b8 & 0x7f) << 7) | (b9 & 0x7f)
+
+
+class SegmentMerger:
     """
-    if not segment_files:
-        raise ValueError("No audio segments to merge")
+    Incremental in-memory MP3 merge that accepts segments out of order
     
-    try:
-        print(f"Merging {len(segment_files)} segments using binary concatenation...")
+    Segments are put as they finish (e.g. as TTS calls complete) and are
+    appended as soon as every earlier segment has arrived, so the merge
+    overlaps with generation and each segment's buffer is released early.
+    The first segment is kept whole; later ones are trimmed to their frame
+    data (ID3 tags dropped) to avoid playback issues.
+    """
+    
+    def __init__(self):
+        """Initialize an empty merge"""
+        self._merged = bytearray()
+        self._pending = []  # heap of (index, data) waiting on earlier segments
+        self._next = 0
+    
+    def put(self, index, data):
+        """
+        Add a segment
         
-        with open(output_path, 'wb') as outfile:
-            for i, segment_file in enumerate(segment_files):
-                if not os.path.exists(segment_file):
-                    print(f"Warning: Segment file not found: {segment_file}")
-                    continue
-                    
-                with open(segment_file, 'rb') as infile:
-                    data = infile.read()
-                    
-                    if i == 0:
-                        # First file: write everything including ID3 tags and headers
-                        outfile.write(data)
-                    else:
-                        # Subsequent files: skip ID3v2 tags to avoid playback issues
-                        if len(data) > 10 and data[:3] == b'ID3':
-                            # ID3v2 tag present - calculate size and skip it
-                            # ID3v2 size is stored in bytes 6-9 as synchsafe integer
-                            size = ((data[6] & 0x7f) << 21) | \
-                                   ((data[7] & 0x7f) << 14) | \
-                                   ((data[8] & 0x7f) << 7) | \
-                                   (data[9] & 0x7f)
-                            # Skip the 10-byte header plus the tag size
-                            data = data[10 + size:]
-                        
-                        # Also skip ID3v1 tags at the end if present
-                        if len(data) > 128 and data[-128:-125] == b'TAG':
-                            data = data[:-128]
-                        
-                        # Write the MP3 frame data
-                        outfile.write(data)
+        Args:
+            index (int): Position of the segment, counting from 0
+            data (bytes): MP3 data for the segment
+        """
+        heapq.heappush(self._pending, (index, data))
         
-        print(f"✓ Successfully merged {len(segment_files)} segments: {output_path}")
-        return output_path
+        while self._pending and self._pending[0][0] == self._next:
+            _, data = heapq.heappop(self._pending)
+            # First segment keeps its ID3 tags and headers; later ones are
+            # appended straight from a view of their frame data
+            if self._next == 0:
+                self._merged += data
+            else:
+                start, end = _id3_frame_bounds(data)
+                self._merged += memoryview(data)[start:end]
+            self._next += 1
+    
+    def getvalue(self):
+        """
+        Get the merged MP3
+        
+        Returns:
+            bytes: Merged MP3 data
         
-    except Exception as e:
-        print(f"Error merging audio segments: {e}")
-        # Fallback: just copy the first file
-        import shutil
-        if segment_files and os.path.exists(segment_files[0]):
-            shutil.copy2(segment_files[0], output_path)
-            print(f"Warning: Used first segment only due to merge error")
-        else:
-            raise
-
-
-def create_silence(duration_ms, output_path):
+        Raises:
+            ValueError: If a segment before one already put is still missing
+        """
+        if self._pending:
+            raise ValueError(f"Segment {self._next} was never merged")
+        return bytes(self._merged)
+
+
+def _id3_frame_bounds(data):
     """
-    Create silence - SKIPPED in no-ffmpeg mode
-    Edge TTS naturally has appropriate pauses between segments.
+    Find the MP3 frame data inside in-memory MP3 data, excluding ID3 tags
+    
+    Only the 10-byte header and the 3 bytes at the ID3v1 position are
+    looked at; nothing is sliced or copied.
     
     Args:
-        duration_ms (int): Duration in milliseconds
-        output_path (str): Output file path
+        data (bytes): MP3 data
         
     Returns:
-        None: Silence creation is skipped (not critical for podcast quality)
+        tuple: (start, end) offsets of the frame data
     """
-    # Skip silence creation - Edge TTS provides natural pauses between segments
-    return None
+    start, end = 0, len(data)
+    
+    if end > 10 and data[:3] == b'ID3':
+        # ID3v2 tag present - calculate size and skip it
+        # Skip the 10-byte header plus the tag size
+        start = min(end, 10 + _id3v2_tag_size(data))
+    
+    # Also skip ID3v1 tags at the end if present
+    if end - start > 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+    
+    return start, end
+
+
+# One silent MPEG-2 Layer III frame matching Edge TTS output (24 kHz, 48 kbps,
+# mono): 4-byte header, all-zero side info and main data. 576 samples = 24 ms.
+_SILENT_FRAME = b'\xff\xf3\x64\xc4' + bytes(140)
+_SILENT_FRAME_MS = 24
+
+
+@functools.lru_cache(maxsize=8)
+def silence_mp3(duration_ms):
+    """
+    Get MP3 silence that concatenates cleanly with Edge TTS audio
+    
+    Built from prebuilt silent frames, so no encoder is needed.
+    
+    Args:
+        duration_ms (int): Duration in milliseconds (rounded to 24 ms frames)
+        
+    Returns:
+        bytes: MP3 frame data
+    """
+    return _SILENT_FRAME * max(1, round(duration_ms / _SILENT_FRAME_MS))
 
 
 def normalize_audio_levels(audio_path, target_dBFS=-20.0):
@@ -257,6 +316,16 @@ def get_audio_duration(audio_path):
     Returns:
         float: Duration in seconds (estimated from file size)
     """
+    # Read it from the MP3 headers when possible (no decoding)
+    if str(audio_path).lower().endswith('.mp3'):
+        try:
+            stat = os.stat(audio_path)
+            duration = _mp3_header_duration(audio_path, stat.st_mtime_ns, stat.st_size)
+            if duration is not None:
+                return duration
+        except OSError:
+            pass
+    
     try:
         # Try with pedalboard if available
         if PEDALBOARD_AVAILABLE:
@@ -272,6 +341,79 @@ def get_audio_duration(audio_path):
     return estimated_duration * 60  # Convert to seconds
 
 
+# MPEG audio Layer III header tables
+_MP3_BITRATES_KBPS = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),    # MPEG-1
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),        # MPEG-2
+    0: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),        # MPEG-2.5
+}
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _mp3_header_duration(audio_path, mtime_ns, size):
+    """
+    Compute MP3 duration from frame headers instead of decoding
+    
+    Uses the frame count in a Xing/Info header when present (VBR files
+    and LAME output), else assumes constant bitrate from the first frame.
+    Cached per file version (mtime_ns and size are part of the key).
+    
+    Args:
+        audio_path (str): Path to audio file
+        mtime_ns (int): File modification time in ns
+        size (int): File size in bytes
+        
+    Returns:
+        float: Duration in seconds, or None if not a Layer III MP3
+    """
+    with open(audio_path, 'rb') as f:
+        head = f.read(10)
+        audio_start = 0
+        if len(head) == 10 and head[:3] == b'ID3':
+            audio_start = 10 + _id3v2_tag_size(head)
+        
+        f.seek(audio_start)
+        data = f.read(4096)
+    
+    # First frame sync: 11 set bits, Layer III, valid bitrate and sample rate
+    pos = data.find(b'\xff')
+    while 0 <= pos <= len(data) - 4:
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        version = (b1 >> 3) & 0x3
+        if (b1 & 0xe0) == 0xe0 and version != 1 and (b1 >> 1) & 0x3 == 1 \
+                and 0 < (b2 >> 4) < 15 and (b2 >> 2) & 0x3 != 3:
+            break
+        pos = data.find(b'\xff', pos + 1)
+    else:
+        return None
+    
+    bitrate = _MP3_BITRATES_KBPS[version][b2 >> 4] * 1000
+    samplerate = _MP3_SAMPLE_RATES[version][(b2 >> 2) & 0x3]
+    samples_per_frame = 1152 if version == 3 else 576
+    mono = (b3 >> 6) == 3
+    
+    # Xing/Info header sits right after the side info of the first frame
+    side_info = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    if len(data) >= xing + 12 and data[xing:xing + 4] in (b'Xing', b'Info') and data[xing + 7] & 0x1:
+        frames = int.from_bytes(data[xing + 8:xing + 12], 'big')
+        return frames * samples_per_frame / samplerate
+    
+    audio_end = size
+    if size - audio_start - pos > 128:
+        with open(audio_path, 'rb') as f:
+            f.seek(size - 128)
+            if f.read(3) == b'TAG':
+                audio_end -= 128
+    
+    return (audio_end - audio_start - pos) * 8 / bitrate
+
+
 def apply_fade_in_out(audio_path, fade_duration_ms=1000):
     """
     Apply fade in and fade out to audio - DISABLED (requires ffmpeg)
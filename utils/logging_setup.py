@@ -0,0 +1,33 @@
+"""
+Logging Setup
+Routes log records through a queue so handlers never block on stdout;
+a background listener thread does the actual writes
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+log_queue = queue.Queue(-1)
+logger = logging.getLogger('podcast')
+logger.setLevel(logging.INFO)
+logger.addHandler(QueueHandler(log_queue))
+logger.propagate = False
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+log_listener.start()
+atexit.register(log_listener.stop)
+
+
+def get_logger(name=None):
+    """
+    Get the queue-backed app logger, or a named child of it
+    
+    Args:
+        name (str): Optional child logger name (e.g. 'generator')
+        
+    Returns:
+        logging.Logger: Logger whose records go through the shared queue
+    """
+    return logger.getChild(name) if name else logger
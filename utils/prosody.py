@@ -3,6 +3,9 @@ Prosody Management for Emotional Speech
 Maps emotions to SSML prosody parameters (rate, pitch, volume)
 """
 
+import re
+import functools
+
 EMOTION_PROSODY = {
     'calm': {
         'rate': '+0%',
@@ -121,6 +124,32 @@ EMOTION_PROSODY = {
 }
 
 
+# Keyword indicators in priority order: when a text matches several
+# emotions, the one listed first wins
+_EMOTION_KEYWORDS = (
+    ('excited', ('amazing', 'wow', 'incredible', 'fantastic', 'awesome', '!')),
+    ('sad', ('sadly', 'unfortunately', 'tragic', 'disappointed')),
+    ('questioning', ('?',)),
+    ('thoughtful', ('think', 'consider', 'believe', 'perhaps', 'maybe')),
+    ('greeting', ('hello', 'welcome', 'hi ', 'hey')),
+    ('closing', ('goodbye', 'thanks for', 'see you', 'that\'s all')),
+    ('grateful', ('thank you', 'thanks', 'grateful', 'appreciate')),
+)
+
+_KEYWORD_EMOTION = {
+    word: (rank, emotion)
+    for rank, (emotion, words) in enumerate(_EMOTION_KEYWORDS)
+    for word in words
+}
+
+# One pass over the text finds every keyword. The lookahead doesn't consume
+# input, so overlapping keywords (e.g. "thanks for" / "thanks") are all seen
+_EMOTION_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(word) for _, words in _EMOTION_KEYWORDS for word in words) + '))'
+)
+
+
+@functools.lru_cache(maxsize=64)
 def get_prosody_for_emotion(emotion):
     """
     Get prosody settings for a given emotion
@@ -131,14 +160,29 @@ def get_prosody_for_emotion(emotion):
     Returns:
         dict: Prosody parameters {rate, pitch, volume}
     """
-    emotion_lower = emotion.lower()
-    
-    # Return emotion prosody if exists, otherwise neutral
-    if emotion_lower in EMOTION_PROSODY:
-        return EMOTION_PROSODY[emotion_lower]
-    else:
-        # Default to calm/neutral
-        return EMOTION_PROSODY['calm']
+    # Return emotion prosody if exists, otherwise calm/neutral
+    return EMOTION_PROSODY.get(emotion.lower(), EMOTION_PROSODY['calm'])
+
+
+# SSML pieces pre-rendered per emotion, so building a segment's markup is
+# just concatenation around the text
+_PROSODY_OPEN = {
+    emotion: f'<prosody rate="{props["rate"]}" pitch="{props["pitch"]}" volume="{props["volume"]}">\n            '
+    for emotion, props in EMOTION_PROSODY.items()
+}
+
+_SSML_CLOSE = '''
+        </prosody>
+    </voice>
+</speak>'''
+
+
+@functools.lru_cache(maxsize=64)
+def _ssml_voice_open(voice_id):
+    """Opening <speak>/<voice> markup for a voice"""
+    return f'''<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
+    <voice name="{voice_id}">
+        '''
 
 
 def build_ssml_with_emotion(text, emotion, voice_id):
@@ -153,17 +197,9 @@ def build_ssml_with_emotion(text, emotion, voice_id):
     Returns:
         str: Complete SSML markup
     """
-    prosody = get_prosody_for_emotion(emotion)
-    
-    ssml = f'''<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
-    <voice name="{voice_id}">
-        <prosody rate="{prosody['rate']}" pitch="{prosody['pitch']}" volume="{prosody['volume']}">
-            {text}
-        </prosody>
-    </voice>
-</speak>'''
+    prosody_open = _PROSODY_OPEN.get(emotion.lower(), _PROSODY_OPEN['calm'])
     
-    return ssml
+    return _ssml_voice_open(voice_id) + prosody_open + text + _SSML_CLOSE
 
 
 def detect_emotion_from_text(text):
@@ -176,39 +212,16 @@ def detect_emotion_from_text(text):
     Returns:
         str: Detected emotion
     """
-    text_lower = text.lower()
-    
-    # Excitement indicators
-    if any(word in text_lower for word in ['amazing', 'wow', 'incredible', 'fantastic', 'awesome', '!']):
-        return 'excited'
-    
-    # Sadness indicators
-    elif any(word in text_lower for word in ['sadly', 'unfortunately', 'tragic', 'disappointed']):
-        return 'sad'
-    
-    # Question indicators
-    elif '?' in text:
-        return 'questioning'
-    
-    # Thoughtful indicators
-    elif any(word in text_lower for word in ['think', 'consider', 'believe', 'perhaps', 'maybe']):
-        return 'thoughtful'
-    
-    # Greeting indicators
-    elif any(word in text_lower for word in ['hello', 'welcome', 'hi ', 'hey']):
-        return 'greeting'
-    
-    # Closing indicators
-    elif any(word in text_lower for word in ['goodbye', 'thanks for', 'see you', 'that\'s all']):
-        return 'closing'
+    best_rank, best_emotion = len(_EMOTION_KEYWORDS), 'calm'
     
-    # Grateful indicators
-    elif any(word in text_lower for word in ['thank you', 'thanks', 'grateful', 'appreciate']):
-        return 'grateful'
+    for match in _EMOTION_RE.finditer(text.lower()):
+        rank, emotion = _KEYWORD_EMOTION[match.group(1)]
+        if rank < best_rank:
+            best_rank, best_emotion = rank, emotion
+            if rank == 0:
+                break
     
-    # Default
-    else:
-        return 'calm'
+    return best_emotion
 
 
 def list_available_emotions():
@@ -0,0 +1,144 @@
+"""
+Request Pool for Edge TTS Segment Scheduling
+Shares a fixed number of TTS slots fairly across concurrent podcast requests,
+and paces how fast new TTS requests are started
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+
+class RequestPool:
+    """
+    Round-robin scheduler for segment jobs from many requests
+
+    Each request submits its segments under its own ID. Up to `width` jobs
+    run at once; whenever a slot frees up it goes to the next request in
+    rotation. A request that arrives while others are mid-script starts
+    synthesizing on the next free slot instead of queueing behind them.
+    """
+
+    def __init__(self, width):
+        """
+        Initialize request pool
+
+        Args:
+            width (int): Max jobs in flight across all requests
+        """
+        self.width = width
+        self._pending = OrderedDict()  # request_id -> deque of (factory, future)
+        self._tasks = {}  # request_id -> set of running tasks
+        self._running = 0
+
+    def submit(self, request_id, factory):
+        """
+        Schedule a job for a request
+
+        Args:
+            request_id: Hashable ID grouping jobs of one request
+            factory: Zero-argument coroutine function that performs the job
+
+        Returns:
+            asyncio.Future: Resolves with the job's result
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(request_id, deque()).append((factory, future))
+        self._fill()
+        return future
+
+    def cancel(self, request_id):
+        """
+        Abandon a request: drop its queued jobs and cancel its running ones
+
+        Args:
+            request_id: ID the jobs were submitted under
+        """
+        for _, future in self._pending.pop(request_id, ()):
+            future.cancel()
+        for task in list(self._tasks.get(request_id, ())):
+            task.cancel()
+
+    def _fill(self):
+        """Start pending jobs, rotating across requests, until all slots are busy"""
+        while self._running < self.width and self._pending:
+            request_id, jobs = next(iter(self._pending.items()))
+            factory, future = jobs.popleft()
+
+            # Send this request to the back of the rotation
+            if jobs:
+                self._pending.move_to_end(request_id)
+            else:
+                del self._pending[request_id]
+
+            # Skip jobs whose caller has already given up
+            if future.done():
+                continue
+
+            self._running += 1
+            task = asyncio.ensure_future(factory())
+            self._tasks.setdefault(request_id, set()).add(task)
+            task.add_done_callback(
+                lambda task, request_id=request_id, future=future: self._finish(request_id, task, future)
+            )
+            # A caller that gives up on its job stops it too, freeing the slot
+            future.add_done_callback(lambda future, task=task: future.cancelled() and task.cancel())
+
+    def _finish(self, request_id, task, future):
+        """Hand a finished job's outcome to its caller and refill the slot"""
+        self._running -= 1
+        tasks = self._tasks.get(request_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks[request_id]
+
+        if task.cancelled():
+            if not future.done():
+                future.cancel()
+        else:
+            error = task.exception()
+            if not future.done():
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(task.result())
+
+        self._fill()
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket that paces calls to at most `rate` per second
+
+    Allows bursts of up to `capacity` calls, then spaces them out evenly.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize token bucket
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Max tokens stored (defaults to rate)
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
@@ -4,6 +4,18 @@ Parses scripts in format: [SPEAKER|emotion] Text
 """
 
 import re
+import sys
+from collections import Counter
+
+
+# Regex pattern: [SPEAKER|emotion] Text
+# Captures until next [SPEAKER| or end of string
+_SEG_RE = re.compile(r'\[([A-Z\-]+)\|(\w+)\]\s*(.+?)(?=\n\[|$)', re.DOTALL)
+
+_VALID_SPEAKERS = frozenset(['HOST', 'GUEST', 'CO-HOST', 'NARRATOR', 'EXPERT'])
+
+# Whitespace after a sentence-ending word
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
 
 
 def parse_podcast_script(script_text):
@@ -21,16 +33,13 @@ def parse_podcast_script(script_text):
     """
     segments = []
     
-    # Regex pattern: [SPEAKER|emotion] Text
-    # Captures until next [SPEAKER| or end of string
-    pattern = r'\[([A-Z\-]+)\|(\w+)\]\s*(.+?)(?=\n\[|$)'
-    
-    matches = re.finditer(pattern, script_text, re.DOTALL)
-    
-    for match in matches:
-        speaker = match.group(1).strip()  # HOST, GUEST, CO-HOST, etc.
-        emotion = match.group(2).strip()  # excited, calm, etc.
-        text = match.group(3).strip()     # The actual dialogue
+    for match in _SEG_RE.finditer(script_text):
+        # HOST/GUEST/CO-HOST..., excited/calm..., and the actual dialogue
+        speaker, emotion, text = match.group(1, 2, 3)
+        # Labels come from a small vocabulary; share one str object per label
+        speaker = sys.intern(speaker.strip())
+        emotion = sys.intern(emotion.strip())
+        text = text.strip()
         
         # Skip empty segments
         if not text:
@@ -59,15 +68,13 @@ def validate_script(segments):
         return False, "Script is empty or invalid format"
     
     # Check for extremely long segments (>500 words)
-    for i, segment in enumerate(segments):
-        word_count = len(segment['text'].split())
+    for i, (segment, word_count) in enumerate(zip(segments, _word_counts(segments))):
         if word_count > 500:
             return False, f"Segment {i+1} ({segment['speaker']}) is too long ({word_count} words). Max 500 words per segment."
     
     # Check for valid speakers
-    valid_speakers = ['HOST', 'GUEST', 'CO-HOST', 'NARRATOR', 'EXPERT']
     for i, segment in enumerate(segments):
-        if segment['speaker'] not in valid_speakers:
+        if segment['speaker'] not in _VALID_SPEAKERS:
             # Warning, but not error
             pass
     
@@ -102,49 +109,62 @@ def split_long_segment(segment, max_words=400):
     Returns:
         list: List of smaller segments
     """
-    words = segment['text'].split()
-    
-    if len(words) <= max_words:
+    if len(segment['text'].split()) <= max_words:
         return [segment]
     
+    # Pack whole sentences into chunks of at most max_words (a single longer
+    # sentence becomes a chunk of its own)
     chunks = []
     current_chunk = []
+    current_words = 0
     
-    for word in words:
-        current_chunk.append(word)
+    for sentence in _SENTENCE_BREAK_RE.split(segment['text'].strip()):
+        sentence_words = len(sentence.split())
         
-        # Check if we've hit a sentence boundary near max_words
-        if len(current_chunk) >= max_words and word.endswith(('.', '!', '?')):
-            chunks.append({
-                'speaker': segment['speaker'],
-                'emotion': segment['emotion'],
-                'text': ' '.join(current_chunk)
-            })
+        if current_chunk and current_words + sentence_words > max_words:
+            # Carry over every other field (e.g. voice_id) from the original segment
+            chunks.append({**segment, 'text': ' '.join(current_chunk)})
             current_chunk = []
+            current_words = 0
+        
+        current_chunk.append(sentence)
+        current_words += sentence_words
     
-    # Add remaining words
+    # Add remaining sentences
     if current_chunk:
-        chunks.append({
-            'speaker': segment['speaker'],
-            'emotion': segment['emotion'],
-            'text': ' '.join(current_chunk)
-        })
+        chunks.append({**segment, 'text': ' '.join(current_chunk)})
     
     return chunks
 
 
-def estimate_duration(segments, words_per_minute=150):
+def _word_counts(segments):
+    """
+    Count the words of every segment in one pass
+    
+    Args:
+        segments (list): Parsed segments
+        
+    Returns:
+        list: Word count per segment, in order
+    """
+    return [len(segment['text'].split()) for segment in segments]
+
+
+def estimate_duration(segments, words_per_minute=150, word_counts=None):
     """
     Estimate podcast duration from segments
     
     Args:
         segments (list): Parsed segments
         words_per_minute (int): Average speaking rate
+        word_counts (list): Precomputed per-segment word counts (optional)
         
     Returns:
         float: Estimated duration in minutes
     """
-    total_words = sum(len(segment['text'].split()) for segment in segments)
+    if word_counts is None:
+        word_counts = _word_counts(segments)
+    total_words = sum(word_counts)
     
     # Add time for pauses between speakers (0.3s per transition)
     num_transitions = len(segments) - 1
@@ -165,30 +185,28 @@ def get_script_statistics(segments):
     Returns:
         dict: Statistics dictionary
     """
-    total_words = sum(len(segment['text'].split()) for segment in segments)
+    word_counts = _word_counts(segments)
+    total_words = sum(word_counts)
     
     # Count by speaker
     speaker_stats = {}
-    for segment in segments:
-        speaker = segment['speaker']
-        if speaker not in speaker_stats:
-            speaker_stats[speaker] = {
+    for segment, word_count in zip(segments, word_counts):
+        stats = speaker_stats.get(segment['speaker'])
+        if stats is None:
+            stats = speaker_stats[segment['speaker']] = {
                 'segments': 0,
                 'words': 0
             }
-        speaker_stats[speaker]['segments'] += 1
-        speaker_stats[speaker]['words'] += len(segment['text'].split())
+        stats['segments'] += 1
+        stats['words'] += word_count
     
     # Count emotions
-    emotion_stats = {}
-    for segment in segments:
-        emotion = segment['emotion']
-        emotion_stats[emotion] = emotion_stats.get(emotion, 0) + 1
+    emotion_stats = dict(Counter(segment['emotion'] for segment in segments))
     
     return {
         'total_segments': len(segments),
         'total_words': total_words,
-        'estimated_duration_minutes': estimate_duration(segments),
+        'estimated_duration_minutes': estimate_duration(segments, word_counts=word_counts),
         'speakers': speaker_stats,
         'emotions': emotion_stats
     }
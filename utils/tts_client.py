@@ -0,0 +1,108 @@
+"""
+Shared Edge TTS Client Plumbing
+Keeps one caching DNS resolver per event loop so Edge TTS requests reuse
+lookups instead of resolving the service host on every call
+"""
+
+import asyncio
+import socket
+import time
+import weakref
+
+import aiohttp
+import edge_tts
+from aiohttp.abc import AbstractResolver
+
+
+class CachingResolver(AbstractResolver):
+    """DNS resolver that remembers answers for a while, shared by many connectors"""
+
+    def __init__(self, ttl=600):
+        """
+        Initialize caching resolver
+
+        Args:
+            ttl (int): Seconds to keep each lookup
+        """
+        self._resolver = aiohttp.DefaultResolver()
+        self._ttl = ttl
+        self._cache = {}  # (host, port, family) -> (expires, addresses)
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        """Resolve a host, answering from the cache while the entry is fresh"""
+        key = (host, port, family)
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+
+        addresses = await self._resolver.resolve(host, port, family)
+        self._cache[key] = (now + self._ttl, addresses)
+        return addresses
+
+    async def close(self):
+        """Drop cached lookups and release the underlying resolver"""
+        self._cache.clear()
+        await self._resolver.close()
+
+
+# One resolver per event loop (the default resolver is bound to its loop)
+_resolvers = weakref.WeakKeyDictionary()
+
+
+async def install_shared_resolver(ttl_dns_cache=600):
+    """
+    Create the shared resolver for the running event loop
+
+    Args:
+        ttl_dns_cache (int): Seconds to cache DNS lookups
+
+    Returns:
+        CachingResolver: The resolver now used by Edge TTS calls on this loop
+    """
+    loop = asyncio.get_running_loop()
+    resolver = _resolvers.get(loop)
+    if resolver is None:
+        resolver = CachingResolver(ttl=ttl_dns_cache)
+        _resolvers[loop] = resolver
+    return resolver
+
+
+async def close_shared_resolver():
+    """Close the shared resolver for the running event loop, if any"""
+    resolver = _resolvers.pop(asyncio.get_running_loop(), None)
+    if resolver is not None:
+        await resolver.close()
+
+
+def connector_kwargs():
+    """
+    Get keyword arguments that route an edge_tts call through the shared resolver
+
+    Each call gets its own connector, which the edge_tts session owns and
+    closes as usual; only the resolver (and its cached lookups) is shared.
+
+    Returns:
+        dict: {'connector': ...} when a resolver is installed for this loop, else {}
+    """
+    try:
+        resolver = _resolvers.get(asyncio.get_running_loop())
+    except RuntimeError:
+        return {}
+    if resolver is None:
+        return {}
+    return {'connector': aiohttp.TCPConnector(resolver=resolver)}
+
+
+def new_communicate(text, voice_id):
+    """
+    Create an edge_tts.Communicate that uses the shared resolver when available
+
+    Args:
+        text (str): Text to speak
+        voice_id (str): Edge TTS voice ID
+
+    Returns:
+        edge_tts.Communicate: Configured communicate object
+    """
+    return edge_tts.Communicate(text, voice_id, **connector_kwargs())
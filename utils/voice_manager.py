@@ -5,6 +5,21 @@ Manages voice selection, organization, and speaker assignments
 
 import edge_tts
 import asyncio
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from itertools import repeat
+from operator import itemgetter
+from types import MappingProxyType
+from typing import NamedTuple
+
+import orjson
+
+from utils.tts_client import connector_kwargs
 
 
 # Default podcast voice assignments
@@ -42,50 +57,287 @@ PODCAST_VOICES = {
 }
 
 
-async def list_all_voices():
+# Locale at the start of a voice ID: language (2-3 letters) and region
+# (2 letters or a 3-digit UN M.49 code), e.g. 'en-US' in 'en-US-AriaNeural'
+_LOCALE_RE = re.compile(r'([a-z]{2,3})-([a-z]{2}|[0-9]{3})(?![^-])', re.IGNORECASE)
+
+# Default voice per language for speakers without an assigned voice
+_DEFAULT_VOICES_BY_LANG = MappingProxyType({
+    'en-US': 'en-US-AriaNeural',
+    'hi-IN': 'hi-IN-SwaraNeural',
+    'es-ES': 'es-ES-ElviraNeural',
+    'fr-FR': 'fr-FR-DeniseNeural',
+    'de-DE': 'de-DE-KatjaNeural',
+    'ja-JP': 'ja-JP-NanamiNeural',
+    'zh-CN': 'zh-CN-XiaoxiaoNeural',
+    'pt-BR': 'pt-BR-FranciscaNeural',
+    'it-IT': 'it-IT-ElsaNeural',
+    'ko-KR': 'ko-KR-SunHiNeural',
+})
+
+
+# Edge TTS voice list cache (the upstream list practically never changes).
+# Kept in memory per process and on disk so new processes skip the fetch too
+_VOICES_CACHE = {'data': None, 'ts': 0}
+_VOICES_TTL = 86400  # 24 hours
+_VOICES_CACHE_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'aipodcast', 'voices.json'
+)
+
+# Cleared while a background prefetch (start_voice_prefetch) is running;
+# cold-cache callers wait briefly on it instead of fetching twice
+_voices_prefetched = threading.Event()
+_voices_prefetched.set()
+_PREFETCH_WAIT = 5  # seconds
+
+
+async def list_all_voices(refresh=False):
     """
     Get all available voices from Edge TTS
     
+    Served from the in-memory or on-disk cache while it is fresh; the
+    network is only hit when both are cold or expired.
+    
+    Args:
+        refresh (bool): Ignore the caches and fetch a new list
+        
+    Returns:
+        list: List of voice dictionaries
+    """
+    if not refresh:
+        voices = _cached_voices()
+        if voices is None and not _voices_prefetched.is_set():
+            await asyncio.to_thread(_voices_prefetched.wait, _PREFETCH_WAIT)
+            voices = _cached_voices()
+        if voices is not None:
+            return voices
+    
+    return await _fetch_voices()
+
+
+async def _fetch_voices():
+    """
+    Fetch the voice list from Edge TTS and update both caches
+    
     Returns:
         list: List of voice dictionaries
     """
-    voices = await edge_tts.list_voices()
+    voices = _normalize_voices(await edge_tts.list_voices(**connector_kwargs()))
+    _VOICES_CACHE['data'] = voices
+    _VOICES_CACHE['ts'] = time.monotonic()
+    _save_voices_to_disk(voices)
+    return voices
+
+
+def list_all_voices_cached():
+    """
+    Synchronous list_all_voices for code outside an event loop
+    
+    Returns:
+        list: List of voice dictionaries
+    """
+    voices = _cached_voices()
+    if voices is None and not _voices_prefetched.is_set():
+        _voices_prefetched.wait(_PREFETCH_WAIT)
+        voices = _cached_voices()
+    if voices is not None:
+        return voices
+    return asyncio.run(_fetch_voices())
+
+
+def _cached_voices():
+    """
+    Get the voice list from memory, else from disk, if still fresh
+    
+    Returns:
+        list: Cached voice dictionaries, or None if there is no fresh copy
+    """
+    if _VOICES_CACHE['data'] is not None and time.monotonic() - _VOICES_CACHE['ts'] < _VOICES_TTL:
+        return _VOICES_CACHE['data']
+    
+    try:
+        age = time.time() - os.path.getmtime(_VOICES_CACHE_FILE)
+        if age >= _VOICES_TTL:
+            return None
+        with open(_VOICES_CACHE_FILE, 'rb') as f:
+            voices = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    
+    # Anything but a voice list (older or foreign file) means refetch
+    if not isinstance(voices, list):
+        return None
+    try:
+        voices = _normalize_voices(voices)
+    except (KeyError, TypeError):
+        return None
+    
+    # Count the disk copy's age against the in-memory TTL as well
+    _VOICES_CACHE['data'] = voices
+    _VOICES_CACHE['ts'] = time.monotonic() - max(age, 0)
+    return voices
+
+
+def _normalize_voices(voices):
+    """
+    Fill in the optional Edge TTS voice fields, once per fetched list
+    
+    ShortName and FriendlyName fall back to Name, so later code can index
+    every field directly.
+    
+    Args:
+        voices (list): Voice dictionaries from Edge TTS (updated in place)
+        
+    Returns:
+        list: The same list
+    """
+    for voice in voices:
+        if 'ShortName' not in voice:
+            voice['ShortName'] = voice['Name']
+        if 'FriendlyName' not in voice:
+            voice['FriendlyName'] = voice['Name']
     return voices
 
 
+def _save_voices_to_disk(voices):
+    """
+    Persist the voice list for other processes (best effort)
+    
+    Args:
+        voices (list): Voice dictionaries from Edge TTS
+    """
+    try:
+        os.makedirs(os.path.dirname(_VOICES_CACHE_FILE), exist_ok=True)
+        # Write to a private file first so readers never see a partial list
+        partial_path = f"{_VOICES_CACHE_FILE}.{os.getpid()}.part"
+        with open(partial_path, 'wb') as f:
+            f.write(orjson.dumps(voices))
+        os.replace(partial_path, _VOICES_CACHE_FILE)
+    except OSError:
+        pass
+
+
+class _VoiceRecord(NamedTuple):
+    """Compact internal form of a voice; public functions return _asdict()"""
+    id: str
+    name: str
+    display_name: str
+    gender: str
+    locale: str
+
+
 def organize_voices_by_locale(voices):
     """
     Group voices by language/locale
     
     Args:
-        voices (list): List of voice dictionaries from Edge TTS
+        voices (list): List of voice dictionaries (from list_all_voices)
         
     Returns:
         dict: Voices organized by locale
     """
-    voices_dict = {}
+    return {
+        locale: [record._asdict() for record in records]
+        for locale, records in _organize_records(voices).items()
+    }
+
+
+def _organize_records(voices):
+    """
+    Group voices by locale as _VoiceRecord tuples
     
-    for voice in voices:
-        locale = voice['Locale']
-        if locale not in voices_dict:
-            voices_dict[locale] = []
+    Args:
+        voices (list): List of voice dictionaries (from list_all_voices)
         
-        # Extract display name (last part after ' - ')
-        friendly_name = voice.get('FriendlyName', voice['Name'])
-        display_name = friendly_name.split(' - ')[-1] if ' - ' in friendly_name else voice['Name']
+    Returns:
+        dict: Locale -> list of _VoiceRecord
+    """
+    voices_dict = defaultdict(list)
+    
+    for voice in voices:
+        entry = _voice_entry(voice)
+        voices_dict[entry.locale].append(entry)
+    
+    return dict(voices_dict)
+
+
+def _voice_entry(voice):
+    """
+    Convert an Edge TTS voice dictionary to a _VoiceRecord
+    
+    Args:
+        voice (dict): Voice dictionary (from list_all_voices)
         
-        # Use ShortName as ID (e.g., 'en-US-AriaNeural') instead of full Name
-        voice_id = voice.get('ShortName', voice['Name'])
+    Returns:
+        _VoiceRecord: (id, name, display_name, gender, locale)
+    """
+    # Extract display name (last part after ' - ')
+    friendly_name = voice['FriendlyName']
+    _, sep, tail = friendly_name.rpartition(' - ')
+    display_name = tail if sep else voice['Name']
+    
+    # Use ShortName as ID (e.g., 'en-US-AriaNeural') instead of full Name
+    voice_id = voice['ShortName']
+    
+    return _VoiceRecord(
+        voice_id,
+        friendly_name,
+        display_name,
+        sys.intern(voice['Gender']),
+        # Hundreds of voices share a few dozen locales; keep one str per locale
+        sys.intern(voice['Locale'])
+    )
+
+
+# Locale index and per-locale (male, female) pools of the most recently
+# organized cached voice list
+_ORGANIZED_CACHE = {'voices': None, 'data': None, 'gender_pools': {}}
+
+
+def _organized_cached_voices(voices):
+    """
+    Get the locale index of _VoiceRecords for the cached voice list, built once
+    
+    Args:
+        voices (list): The list returned by list_all_voices
         
-        voices_dict[locale].append({
-            'id': voice_id,
-            'name': friendly_name,
-            'display_name': display_name,
-            'gender': voice['Gender'],
-            'locale': locale
-        })
+    Returns:
+        dict: Locale -> list of _VoiceRecord (shared; don't mutate)
+    """
+    # Compare by identity: the cached list object is replaced, never mutated
+    if _ORGANIZED_CACHE['voices'] is not voices:
+        _ORGANIZED_CACHE['data'] = _organize_records(voices)
+        _ORGANIZED_CACHE['gender_pools'] = {}
+        _ORGANIZED_CACHE['voices'] = voices
+    return _ORGANIZED_CACHE['data']
+
+
+def _partition_by_gender(locale_voices, limit=None):
+    """
+    Split voices into male and female pools in one pass
     
-    return voices_dict
+    Args:
+        locale_voices (list): _VoiceRecords of one locale
+        limit (int): Stop once both pools hold this many voices (None = all)
+        
+    Returns:
+        tuple: (male voices, female voices); other genders are left out
+    """
+    male_voices, female_voices = [], []
+    for voice in locale_voices:
+        gender = voice.gender
+        if gender == 'Male':
+            if limit is None or len(male_voices) < limit:
+                male_voices.append(voice)
+        elif gender == 'Female':
+            if limit is None or len(female_voices) < limit:
+                female_voices.append(voice)
+        else:
+            continue
+        if limit is not None and len(male_voices) >= limit and len(female_voices) >= limit:
+            break
+    return male_voices, female_voices
 
 
 def assign_voices_to_script(segments, custom_voices=None, language='en-US'):
@@ -102,35 +354,24 @@ def assign_voices_to_script(segments, custom_voices=None, language='en-US'):
     """
     voice_map = custom_voices if custom_voices else PODCAST_VOICES
     
-    # Get default voice based on language if no custom voices provided
-    default_voices_by_lang = {
-        'en-US': 'en-US-AriaNeural',
-        'hi-IN': 'hi-IN-SwaraNeural',
-        'es-ES': 'es-ES-ElviraNeural',
-        'fr-FR': 'fr-FR-DeniseNeural',
-        'de-DE': 'de-DE-KatjaNeural',
-        'ja-JP': 'ja-JP-NanamiNeural',
-        'zh-CN': 'zh-CN-XiaoxiaoNeural',
-        'pt-BR': 'pt-BR-FranciscaNeural',
-        'it-IT': 'it-IT-ElsaNeural',
-        'ko-KR': 'ko-KR-SunHiNeural',
-    }
-    
-    default_voice = default_voices_by_lang.get(language, 'en-US-AriaNeural')
+    speakers = list(map(itemgetter('speaker'), segments))
     
-    for segment in segments:
-        speaker = segment['speaker']
-        
+    # Flatten to speaker -> voice ID once per speaker in the script; entries
+    # are either voice info dicts (like PODCAST_VOICES) or plain voice ID
+    # strings. Entries for speakers the script doesn't use are never read
+    flat_voices = {}
+    for speaker in set(speakers):
         if speaker in voice_map:
-            # Use mapped voice
-            if isinstance(voice_map[speaker], dict):
-                segment['voice_id'] = voice_map[speaker]['voice_id']
-            else:
-                # Simple string mapping
-                segment['voice_id'] = voice_map[speaker]
-        else:
-            # Use language-appropriate default voice
-            segment['voice_id'] = default_voice
+            voice = voice_map[speaker]
+            flat_voices[speaker] = voice['voice_id'] if isinstance(voice, dict) else voice
+    
+    # Speakers without a mapping get a language-appropriate default voice
+    default_voice = _DEFAULT_VOICES_BY_LANG.get(language, 'en-US-AriaNeural')
+    
+    # Resolve every speaker in C (map over dict.get), then store
+    voice_ids = list(map(flat_voices.get, speakers, repeat(default_voice)))
+    for segment, voice_id in zip(segments, voice_ids):
+        segment['voice_id'] = voice_id
     
     return segments
 
@@ -147,12 +388,47 @@ def get_voices_for_language(locale, voices=None):
         list: Voices for that locale
     """
     if voices is None:
-        voices = asyncio.run(list_all_voices())
+        voices = list_all_voices_cached()
     
-    organized = organize_voices_by_locale(voices)
-    return organized.get(locale, [])
+    # The cached list gets a reusable locale index
+    if voices is _VOICES_CACHE['data']:
+        records = _organized_cached_voices(voices).get(locale, ())
+    else:
+        records = _records_for_language(locale, voices)
+    return [record._asdict() for record in records]
 
 
+def _records_for_language(locale, voices):
+    """
+    Convert just the voices of one locale to _VoiceRecords
+    
+    Args:
+        locale (str): Language code (e.g., 'en-US', 'es-ES')
+        voices (list): Voice dictionaries (from list_all_voices)
+        
+    Returns:
+        list: _VoiceRecord per voice of that locale
+    """
+    return [_voice_entry(voice) for voice in voices if voice['Locale'] == locale]
+
+
+async def get_voices_for_language_async(locale, voices=None):
+    """
+    Get all voices for a specific language/locale, without blocking the event loop
+    
+    Args:
+        locale (str): Language code (e.g., 'en-US', 'es-ES')
+        voices (list): Optional pre-fetched voice list
+        
+    Returns:
+        list: Voices for that locale
+    """
+    if voices is None:
+        voices = await list_all_voices()
+    return get_voices_for_language(locale, voices)
+
+
+@functools.lru_cache(maxsize=256)
 def detect_language_from_voice(voice_id):
     """
     Extract language code from voice ID
@@ -165,12 +441,39 @@ def detect_language_from_voice(voice_id):
     """
     # Voice IDs are formatted as: locale-name
     # e.g., 'en-US-AriaNeural'
-    parts = voice_id.split('-')
-    if len(parts) >= 2:
-        return f"{parts[0]}-{parts[1]}"
-    return 'en-US'  # Default
+    match = _LOCALE_RE.match(voice_id)
+    if match is None:
+        return 'en-US'  # Default
+    
+    language, region = match.group(1, 2)
+    return f"{language.lower()}-{region.upper()}"
+
 
+# Demo sentence per language, with regional variants keyed by full locale
+# (looked up longest prefix first)
+_DEMO_TEXTS = MappingProxyType({
+    'en': "Hello! This is a demo of my voice. I can speak naturally with emotion and expression.",
+    'es': "¡Hola! Esta es una demostración de mi voz. Puedo hablar de forma natural con emoción.",
+    'fr': "Bonjour! Ceci est une démonstration de ma voix. Je peux parler naturellement avec émotion.",
+    'de': "Hallo! Dies ist eine Demonstration meiner Stimme. Ich kann natürlich mit Emotion sprechen.",
+    'ja': "こんにちは！これは私の声のデモです。自然に感情を込めて話すことができます。",
+    'zh': "你好！这是我的声音演示。我可以自然地表达情感。",
+    'zh-TW': "你好！這是我的聲音演示。我可以自然地表達情感。",
+    'zh-HK': "你好！這是我的聲音演示。我可以自然地表達情感。",
+    'ar': "مرحبا! هذا عرض توضيحي لصوتي. يمكنني التحدث بشكل طبيعي مع العاطفة.",
+    'hi': "नमस्ते! यह मेरी आवाज़ का प्रदर्शन है। मैं भावना के साथ स्वाभाविक रूप से बोल सकता हूं।",
+    'pt': "Olá! Esta é uma demonstração da minha voz. Posso falar naturalmente com emoção.",
+    'ru': "Привет! Это демонстрация моего голоса. Я могу говорить естественно с эмоциями.",
+    'it': "Ciao! Questa è una dimostrazione della mia voce. Posso parlare naturalmente con emozione.",
+    'ko': "안녕하세요! 이것은 제 목소리 데모입니다. 감정을 담아 자연스럽게 말할 수 있습니다.",
+    'nl': "Hallo! Dit is een demo van mijn stem. Ik kan natuurlijk spreken met emotie.",
+    'pl': "Cześć! To jest demonstracja mojego głosu. Mogę mówić naturalnie z emocjami.",
+    'sv': "Hej! Detta är en demonstration av min röst. Jag kan tala naturligt med känslor.",
+    'tr': "Merhaba! Bu benim sesimin bir gösterimi. Duygularla doğal bir şekilde konuşabilirim.",
+})
 
+
+@functools.lru_cache(maxsize=256)
 def get_demo_text_for_locale(locale):
     """
     Get appropriate demo text for a language
@@ -181,29 +484,36 @@ def get_demo_text_for_locale(locale):
     Returns:
         str: Demo text in that language
     """
-    # Extract base language (first part before -)
-    lang = locale.split('-')[0].lower()
+    # Longest prefix first: 'zh-TW' -> 'zh-TW', then 'zh'
+    prefix = locale
+    while prefix:
+        text = _DEMO_TEXTS.get(prefix)
+        if text is not None:
+            return text
+        prefix = prefix.rpartition('-')[0]
     
-    demo_texts = {
-        'en': "Hello! This is a demo of my voice. I can speak naturally with emotion and expression.",
-        'es': "¡Hola! Esta es una demostración de mi voz. Puedo hablar de forma natural con emoción.",
-        'fr': "Bonjour! Ceci est une démonstration de ma voix. Je peux parler naturellement avec émotion.",
-        'de': "Hallo! Dies ist eine Demonstration meiner Stimme. Ich kann natürlich mit Emotion sprechen.",
-        'ja': "こんにちは！これは私の声のデモです。自然に感情を込めて話すことができます。",
-        'zh': "你好！这是我的声音演示。我可以自然地表达情感。",
-        'ar': "مرحبا! هذا عرض توضيحي لصوتي. يمكنني التحدث بشكل طبيعي مع العاطفة.",
-        'hi': "नमस्ते! यह मेरी आवाज़ का प्रदर्शन है। मैं भावना के साथ स्वाभाविक रूप से बोल सकता हूं।",
-        'pt': "Olá! Esta é uma demonstração da minha voz. Posso falar naturalmente com emoção.",
-        'ru': "Привет! Это демонстрация моего голоса. Я могу говорить естественно с эмоциями.",
-        'it': "Ciao! Questa è una dimostrazione della mia voce. Posso parlare naturalmente con emozione.",
-        'ko': "안녕하세요! 이것은 제 목소리 데모입니다. 감정을 담아 자연스럽게 말할 수 있습니다.",
-        'nl': "Hallo! Dit is een demo van mijn stem. Ik kan natuurlijk spreken met emotie.",
-        'pl': "Cześć! To jest demonstracja mojego głosu. Mogę mówić naturalnie z emocjami.",
-        'sv': "Hej! Detta är en demonstration av min röst. Jag kan tala naturligt med känslor.",
-        'tr': "Merhaba! Bu benim sesimin bir gösterimi. Duygularla doğal bir şekilde konuşabilirim.",
-    }
+    # Extract base language (first part before -), in any case
+    lang = locale.split('-')[0].lower()
+    return _DEMO_TEXTS.get(lang, _DEMO_TEXTS['en'])
+
+
+# UTF-8 form of each demo text, for callers that hash or send raw bytes
+_DEMO_TEXTS_UTF8 = MappingProxyType({
+    text: text.encode('utf-8') for text in _DEMO_TEXTS.values()
+})
+
+
+def get_demo_text_bytes_for_locale(locale):
+    """
+    Get the demo text for a language, pre-encoded as UTF-8
     
-    return demo_texts.get(lang, demo_texts['en'])
+    Args:
+        locale (str): Language code (e.g., 'en-US')
+        
+    Returns:
+        bytes: get_demo_text_for_locale(locale) encoded as UTF-8
+    """
+    return _DEMO_TEXTS_UTF8[get_demo_text_for_locale(locale)]
 
 
 def recommend_voices_for_podcast(num_speakers=2, locale='en-US', voices=None):
@@ -219,43 +529,85 @@ def recommend_voices_for_podcast(num_speakers=2, locale='en-US', voices=None):
         list: Recommended voice combinations
     """
     if voices is None:
-        voices = asyncio.run(list_all_voices())
+        voices = list_all_voices_cached()
     
-    locale_voices = get_voices_for_language(locale, voices)
+    # Separate by gender for variety (kept per locale for the cached list).
+    # Recommendations use at most the first two voices of each gender
+    limit = 2
+    if voices is _VOICES_CACHE['data']:
+        # Organizing also resets the pools if the cached list was refreshed
+        organized = _organized_cached_voices(voices)
+        pools = _ORGANIZED_CACHE['gender_pools']
+        partition = pools.get(locale)
+        if partition is None:
+            partition = pools[locale] = _partition_by_gender(organized.get(locale, ()), limit)
+        male_voices, female_voices = partition
+    else:
+        male_voices, female_voices = _partition_by_gender(_records_for_language(locale, voices), limit)
     
-    if not locale_voices:
+    if not male_voices and not female_voices:
         return []
     
-    # Separate by gender for variety
-    male_voices = [v for v in locale_voices if v['gender'] == 'Male']
-    female_voices = [v for v in locale_voices if v['gender'] == 'Female']
-    
     recommendations = []
     
     # Recommend alternating genders for natural conversation
     if num_speakers == 2:
         if female_voices and male_voices:
             recommendations.append({
-                'HOST': female_voices[0]['id'],
-                'GUEST': male_voices[0]['id']
+                'HOST': female_voices[0].id,
+                'GUEST': male_voices[0].id
             })
             if len(male_voices) > 1 and len(female_voices) > 1:
                 recommendations.append({
-                    'HOST': male_voices[0]['id'],
-                    'GUEST': female_voices[1]['id']
+                    'HOST': male_voices[0].id,
+                    'GUEST': female_voices[1].id
                 })
     
     elif num_speakers == 3:
         if len(female_voices) >= 2 and male_voices:
             recommendations.append({
-                'HOST': female_voices[0]['id'],
-                'CO-HOST': male_voices[0]['id'],
-                'GUEST': female_voices[1]['id']
+                'HOST': female_voices[0].id,
+                'CO-HOST': male_voices[0].id,
+                'GUEST': female_voices[1].id
             })
     
     return recommendations
 
 
+async def recommend_voices_for_podcast_async(num_speakers=2, locale='en-US', voices=None):
+    """
+    Recommend voice combinations for a podcast, without blocking the event loop
+    
+    Args:
+        num_speakers (int): Number of speakers needed
+        locale (str): Language locale
+        voices (list): Optional pre-fetched voice list
+        
+    Returns:
+        list: Recommended voice combinations
+    """
+    if voices is None:
+        voices = await list_all_voices()
+    return recommend_voices_for_podcast(num_speakers, locale, voices)
+
+
+def _prefetch_voices():
+    """Warm the voice cache in the background (network errors are left to callers)"""
+    try:
+        if _cached_voices() is None:
+            asyncio.run(_fetch_voices())
+    except Exception:
+        pass
+    finally:
+        _voices_prefetched.set()
+
+
+def start_voice_prefetch():
+    """Start fetching the voice list in a background thread, so the first lookup finds it ready"""
+    _voices_prefetched.clear()
+    threading.Thread(target=_prefetch_voices, name='voice-prefetch', daemon=True).start()
+
+
 if __name__ == '__main__':
     # Test voice manager
     print("Testing Voice Manager...")